@@ -0,0 +1,33 @@
+"""Daily batch jobs.
+
+Run once per trading day after the close (e.g. from cron), from the project root:
+
+    python app/jobs.py
+"""
+import time
+
+from utils.database import init_db
+from utils.portfolio import update_all_portfolio_snapshots
+from utils.screener import update_screener_metrics
+from utils.suggestions import update_suggestion_rankings
+
+def run_daily_jobs():
+    """Run every daily job in order and print how long each took"""
+    init_db()
+
+    jobs = [
+        ("portfolio snapshots", update_all_portfolio_snapshots),
+        ("screener metrics", update_screener_metrics),
+        ("suggestion rankings", update_suggestion_rankings),
+    ]
+
+    for name, job in jobs:
+        start = time.perf_counter()
+        try:
+            result = job()
+            print(f"{name}: done in {time.perf_counter() - start:.1f}s ({result})")
+        except Exception as e:
+            print(f"{name}: failed after {time.perf_counter() - start:.1f}s: {str(e)}")
+
+if __name__ == "__main__":
+    run_daily_jobs()
@@ -8,29 +8,52 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-import sqlite3
-import os
-from pages.login import show_login
-from pages.signup import show_signup
-from pages.dashboard import show_dashboard
-from pages.stock_analysis import show_stock_analysis
-from pages.portfolio import show_portfolio
-from pages.watchlist import show_watchlist
-from pages.risk_assessment import show_risk_assessment
-from pages.education import show_education
-# from pages.chatbot import show_chatbot
-from pages.about import show_about
-from pages.settings import show_settings
-from utils.database import init_db
+import importlib
+import logging
+import sys
+import time
+from utils.database import get_connection, RISK_SCORE_QUERY
 from utils.session import check_session
-from pages.assistant import show_assistant
+from utils.bootstrap import bootstrap
 
-# Initialize database if it doesn't exist
-init_db()
+logger = logging.getLogger(__name__)
+
+# Page registry: page name -> (module, render function). A page's module is only
+# imported the first time that page is shown, so e.g. the login screen doesn't
+# pay for plotly, matplotlib or the Gemini SDK.
+PAGES = {
+    "Login": ("pages.login", "show_login"),
+    "Sign Up": ("pages.signup", "show_signup"),
+    "Dashboard": ("pages.dashboard", "show_dashboard"),
+    "Stock Analysis": ("pages.stock_analysis", "show_stock_analysis"),
+    "Stock Screener": ("pages.screener", "show_screener"),
+    "Portfolio": ("pages.portfolio", "show_portfolio"),
+    "Watchlist": ("pages.watchlist", "show_watchlist"),
+    "Risk Assessment": ("pages.risk_assessment", "show_risk_assessment"),
+    "Education Center": ("pages.education", "show_education"),
+    "AI Assistant": ("pages.assistant", "show_assistant"),
+    "About Us": ("pages.about", "show_about"),
+    "Settings": ("pages.settings", "show_settings"),
+}
+
+def load_page(page):
+    """Return the render function for a page, importing its module on first use"""
+    module_name, function_name = PAGES[page]
+    
+    if module_name not in sys.modules:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        logger.debug("Imported %s in %.1f ms", module_name, (time.perf_counter() - start) * 1000)
+    else:
+        module = sys.modules[module_name]
+    
+    return getattr(module, function_name)
+
+# Database migrations and static assets run once per process, not on every rerun
+startup = bootstrap()
 
 # Custom CSS for styling
-with open("static/css/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+st.markdown(f"<style>{startup['css']}</style>", unsafe_allow_html=True)
 
 # Check if user is logged in
 user_id, username = check_session()
@@ -47,10 +70,7 @@ def main():
             
             auth_option = st.radio("", ["Login", "Sign Up"])
         
-        if auth_option == "Login":
-            show_login()
-        else:
-            show_signup()
+        load_page(auth_option)()
     
     # If user is logged in, show main application
     else:
@@ -66,6 +86,7 @@ def main():
             page = st.radio("Navigation", [
                 "Dashboard", 
                 "Stock Analysis", 
+                "Stock Screener",
                 "Portfolio", 
                 "Watchlist", 
                 "Risk Assessment",
@@ -84,11 +105,10 @@ def main():
                 st.rerun()
             
             # Get user's risk profile from database
-            conn = sqlite3.connect('database/stock_analyzer.db')
+            conn = get_connection()
             c = conn.cursor()
-            c.execute("SELECT risk_score, risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
+            c.execute(RISK_SCORE_QUERY, (user_id,))
             risk_data = c.fetchone()
-            conn.close()
             
             # Display risk profile if available
             if risk_data:
@@ -107,24 +127,10 @@ def main():
             st.markdown("<div class='footer'>© 2025 Stock Analyzer</div>", unsafe_allow_html=True)
         
         # Main content based on selected page
-        if page == "Dashboard":
-            show_dashboard(user_id)
-        elif page == "Stock Analysis":
-            show_stock_analysis(user_id)
-        elif page == "Portfolio":
-            show_portfolio(user_id)
-        elif page == "Watchlist":
-            show_watchlist(user_id)
-        elif page == "Risk Assessment":
-            show_risk_assessment(user_id)
-        elif page == "Education Center":
-            show_education(user_id)
-        elif page == "AI Assistant":
-            show_assistant(user_id)
-        elif page == "About Us":
-            show_about()
-        elif page == "Settings":
-            show_settings(user_id)
+        if page == "About Us":
+            load_page(page)()
+        else:
+            load_page(page)(user_id)
 
 if __name__ == "__main__":
     main()
@@ -4,8 +4,9 @@ from google.genai import types # New import for types
 import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
-import yfinance as yf
 import os
+from datetime import datetime, timedelta
+from utils.price_store import get_price_store
 
 # --- Configuration and Setup ---
 
@@ -30,11 +31,16 @@ except Exception as e:
 # --- Stock Data Functions (No changes needed from original) ---
 
 # ... (Keep your stock data functions as they are) ...
+def get_history(ticker):
+    """Gets the last year of daily bars for a ticker from the local price store."""
+    end_date = datetime.now() + timedelta(days=1)  # Include today's bar
+    start_date = end_date - timedelta(days=366)
+    return get_price_store().get_prices(ticker, start_date, end_date)
+
 def get_stock_price(ticker):
     """Gets the latest closing stock price for a given ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        history = stock.history(period="1y")
+        history = get_history(ticker)
         if history.empty:
             return f"Could not retrieve data for ticker: {ticker}. It might be invalid or delisted."
         return str(history.iloc[-1].Close)
@@ -44,7 +50,7 @@ def get_stock_price(ticker):
 def calculate_SMA(ticker, window):
     """Calculates the Simple Moving Average (SMA) for a given ticker and window."""
     try:
-        data = yf.Ticker(ticker).history(period="1y").Close
+        data = get_history(ticker).Close
         if data.empty:
             return f"Could not retrieve data for ticker: {ticker} for SMA calculation."
         if len(data) < window:
@@ -56,7 +62,7 @@ def calculate_SMA(ticker, window):
 def calculate_EMA(ticker, window):
     """Calculates the Exponential Moving Average (EMA) for a given ticker and window."""
     try:
-        data = yf.Ticker(ticker).history(period="1y").Close
+        data = get_history(ticker).Close
         if data.empty:
              return f"Could not retrieve data for ticker: {ticker} for EMA calculation."
         if len(data) < window: # EMA technically works but gives less meaningful results early on
@@ -68,7 +74,7 @@ def calculate_EMA(ticker, window):
 def calculate_RSI(ticker):
     """Calculates the Relative Strength Index (RSI) for a given ticker."""
     try:
-        data = yf.Ticker(ticker).history(period="1y").Close
+        data = get_history(ticker).Close
         if data.empty:
               return f"Could not retrieve data for ticker: {ticker} for RSI calculation."
         delta = data.diff()
@@ -87,7 +93,7 @@ def calculate_RSI(ticker):
 def calculate_MACD(ticker):
     """Calculates the Moving Average Convergence Divergence (MACD) for a given ticker."""
     try:
-        data = yf.Ticker(ticker).history(period="1y").Close
+        data = get_history(ticker).Close
         if data.empty:
               return f"Could not retrieve data for ticker: {ticker} for MACD calculation."
         exp1 = data.ewm(span=12, adjust=False).mean()
@@ -105,7 +111,7 @@ def calculate_MACD(ticker):
 def plot_stock_price(ticker):
     """Plots the stock price for the last year for a given ticker and saves it."""
     try:
-        data = yf.Ticker(ticker).history(period="1y")
+        data = get_history(ticker)
         if data.empty:
             return f"Could not retrieve data for ticker: {ticker} to plot."
 
@@ -1,10 +1,11 @@
 import streamlit as st
-import sqlite3
+from utils.database import get_connection, RISK_PROFILE_QUERY, CHAT_HISTORY_QUERY, PORTFOLIO_POSITIONS_QUERY
 import pandas as pd
 import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 from utils.chatbot_model import StockChatbotModel
+from utils.quotes import get_quote_service
 
 def show_chatbot(user_id):
     st.markdown('<div class="main-header">AI Investment Assistant</div>', unsafe_allow_html=True)
@@ -27,19 +28,12 @@ def show_chatbot(user_id):
     # Initialize chat history if not already done
     if 'chat_history' not in st.session_state:
         # Check if user has chat history in database
-        conn = sqlite3.connect('database/stock_analyzer.db')
+        conn = get_connection()
         c = conn.cursor()
         
-        c.execute("""
-        SELECT message, is_user, timestamp
-        FROM chat_messages
-        WHERE user_id = ?
-        ORDER BY timestamp ASC
-        LIMIT 20
-        """, (user_id,))
+        c.execute(CHAT_HISTORY_QUERY, (user_id,))
         
         messages = c.fetchall()
-        conn.close()
         
         if messages:
             st.session_state.chat_history = [
@@ -96,7 +90,7 @@ def show_chatbot(user_id):
             # Process the message
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            with sqlite3.connect('database/stock_analyzer.db') as conn:
+            with get_connection() as conn:
                 c = conn.cursor()
                 
                 # Add user message to chat history
@@ -159,9 +153,9 @@ def process_query(query, user_id):
             return data
         
         # Get user's risk profile from database
-        with sqlite3.connect('database/stock_analyzer.db') as conn:
+        with get_connection() as conn:
             c = conn.cursor()
-            c.execute("SELECT risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
+            c.execute(RISK_PROFILE_QUERY, (user_id,))
             risk_profile_data = c.fetchone()
         
         risk_profile = risk_profile_data[0] if risk_profile_data else "Moderate"
@@ -182,12 +176,11 @@ def process_query(query, user_id):
 def generate_stock_recommendation(user_id):
     """Generate stock recommendations based on user's risk profile"""
     # Get user's risk profile from database
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("SELECT risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
+    c.execute(RISK_PROFILE_QUERY, (user_id,))
     risk_profile_data = c.fetchone()
-    conn.close()
     
     if not risk_profile_data:
         return "I need to understand your risk tolerance before making recommendations. Please complete the Risk Assessment in the Risk Assessment section."
@@ -321,27 +314,21 @@ def analyze_specific_stock(ticker):
 def provide_portfolio_advice(user_id):
     """Provide portfolio advice based on user's holdings and risk profile"""
     # Get user's risk profile from database
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("SELECT risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
+    c.execute(RISK_PROFILE_QUERY, (user_id,))
     risk_profile_data = c.fetchone()
     
     if not risk_profile_data:
-        conn.close()
         return "I need to understand your risk tolerance before providing portfolio advice. Please complete the Risk Assessment in the Risk Assessment section."
     
     risk_profile = risk_profile_data[0]
     
     # Get user's portfolio from database
-    c.execute("""
-    SELECT ticker, shares, purchase_price
-    FROM portfolio_items
-    WHERE user_id = ?
-    """, (user_id,))
+    c.execute(PORTFOLIO_POSITIONS_QUERY, (user_id,))
     
     portfolio_items = c.fetchall()
-    conn.close()
     
     if not portfolio_items:
         return "I don't see any stocks in your portfolio yet. Add some stocks to your portfolio, and I'll provide personalized advice."
@@ -350,14 +337,16 @@ def provide_portfolio_advice(user_id):
     portfolio_data = []
     total_value = 0
     
+    # Current prices for every holding in one batched request
+    quotes = get_quote_service().get_quotes([item[0] for item in portfolio_items])
+    
     for item in portfolio_items:
         ticker, shares, purchase_price = item
         
         try:
             # Get current price
-            current_data = yf.download(ticker, period="1d")
-            if not current_data.empty:
-                current_price = current_data['Close'].iloc[-1]
+            current_price = quotes.loc[ticker.upper(), 'Price']
+            if not pd.isna(current_price):
                 
                 item_value = shares * current_price
                 total_value += item_value
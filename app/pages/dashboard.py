@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import sqlite3
+from utils.database import get_connection, PORTFOLIO_COUNT_QUERY, PORTFOLIO_ITEMS_QUERY
+from utils.movers import get_top_movers
+from utils.portfolio import get_portfolio_nav
+from utils.quotes import MARKET_INDICES, get_index_refresher, get_quote_service
 from utils.stock_utils import get_company_logo, get_stock_news
 
 def safe_float_convert(value):
@@ -104,112 +106,97 @@ def show_dashboard(user_id):
     # Market overview
     st.markdown('<div class="sub-header">Market Overview</div>', unsafe_allow_html=True)
     
-    # Fetch major indices data
-    indices = {
-        '^GSPC': 'S&P 500',
-        '^DJI': 'Dow Jones',
-        '^IXIC': 'NASDAQ',
-        '^RUT': 'Russell 2000'
-    }
+    # Index quotes are kept in memory by a background refresher, started by the first dashboard
+    # render; reading them never waits on the network
+    index_quotes = get_index_refresher().get_quotes()
     
     indices_data = []
     
-    for ticker, name in indices.items():
-        try:
-            data = yf.download(ticker, period="2d")
-            if not data.empty and len(data) >= 2:
-                current = data['Close'].iloc[-1]
-                prev = data['Close'].iloc[-2]
-                change = current - prev
-                change_pct = (change / prev) * 100
-                
-                indices_data.append({
-                    'Index': name,
-                    'Price': current,
-                    'Change': change,
-                    'Change %': change_pct
-                })
-        except:
-            pass
+    for ticker, name in MARKET_INDICES.items():
+        if ticker not in index_quotes.index:
+            continue
+        current, prev = index_quotes.loc[ticker, 'Price'], index_quotes.loc[ticker, 'Previous Close']
+        if pd.isna(current) or pd.isna(prev) or prev == 0:
+            continue
+        change = current - prev
+        change_pct = (change / prev) * 100
+        
+        indices_data.append({
+            'Index': name,
+            'Price': current,
+            'Change': change,
+            'Change %': change_pct
+        })
     
     # Display indices as cards
-    cols = st.columns(len(indices_data))
-    
-    for i, idx in enumerate(indices_data):
-        with cols[i]:
-            change_color = "positive" if (idx['Change'] >= 0).all() else "negative"
-
-            change_icon = "↑" if (idx['Change'] >= 0).all() else "↓"
-            
-            st.markdown(f"""
-            <div class="metric-card">
-                <h3>{idx['Index']}</h3>
-                <div class="metric-label {change_color}">{change_icon} {abs(idx['Price'].iloc[0]):.2f} ({idx['Change %'].iloc[0]:.2f}%)</div>
-            </div>
-            """, unsafe_allow_html=True)
+    if indices_data:
+        cols = st.columns(len(indices_data))
+        
+        for i, idx in enumerate(indices_data):
+            with cols[i]:
+                change_color = "positive" if idx['Change'] >= 0 else "negative"
+                change_icon = "↑" if idx['Change'] >= 0 else "↓"
+                
+                st.markdown(f"""
+                <div class="metric-card">
+                    <h3>{idx['Index']}</h3>
+                    <div class="metric-label {change_color}">{change_icon} {abs(idx['Price']):.2f} ({idx['Change %']:.2f}%)</div>
+                </div>
+                """, unsafe_allow_html=True)
+    else:
+        st.info("Market data is loading. Refresh in a moment.")
     
     # Top gainers and losers
     st.markdown('<div class="sub-header">Top Movers Today</div>', unsafe_allow_html=True)
     
+    # Movers across the screener universe, ranked from a background-refreshed quote snapshot
+    try:
+        gainers, losers = get_top_movers(k=3)
+    except Exception as e:
+        print(f"Error computing top movers: {str(e)}")
+        gainers, losers = None, None
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown('<h3>Top Gainers</h3>', unsafe_allow_html=True)
-        try:
-            # This is a placeholder - in a real app, you'd use a proper API to get top gainers
-            gainers = [
-                {'Ticker': 'AAPL', 'Change %': 2.5},
-                {'Ticker': 'MSFT', 'Change %': 1.8},
-                {'Ticker': 'AMZN', 'Change %': 1.5}
-            ]
-            
+        if gainers:
             for gainer in gainers:
                 st.markdown(f"""
                 <div class="card">
                     <h3>{gainer['Ticker']}</h3>
-                    <p class="positive">↑ {gainer['Change %']}%</p>
+                    <p class="positive">↑ {gainer['Change %']:.2f}%</p>
                 </div>
                 """, unsafe_allow_html=True)
-        except:
+        else:
             st.info("Unable to fetch top gainers data.")
     
     with col2:
         st.markdown('<h3>Top Losers</h3>', unsafe_allow_html=True)
-        try:
-            # This is a placeholder - in a real app, you'd use a proper API to get top losers
-            losers = [
-                {'Ticker': 'NFLX', 'Change %': -1.8},
-                {'Ticker': 'TSLA', 'Change %': -1.5},
-                {'Ticker': 'META', 'Change %': -1.2}
-            ]
-            
+        if losers:
             for loser in losers:
                 st.markdown(f"""
                 <div class="card">
                     <h3>{loser['Ticker']}</h3>
-                    <p class="negative">↓ {abs(loser['Change %'])}%</p>
+                    <p class="negative">↓ {abs(loser['Change %']):.2f}%</p>
                 </div>
                 """, unsafe_allow_html=True)
-        except:
+        else:
             st.info("Unable to fetch top losers data.")
     
     # Portfolio summary if available
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
     # Check if user has portfolio items
-    c.execute("SELECT COUNT(*) FROM portfolio_items WHERE user_id = ?", (user_id,))
+    c.execute(PORTFOLIO_COUNT_QUERY, (user_id,))
     portfolio_count = c.fetchone()[0]
     
     if portfolio_count > 0:
         st.markdown('<div class="sub-header">Your Portfolio Summary</div>', unsafe_allow_html=True)
         
         # Get portfolio data
-        c.execute("""
-        SELECT ticker, shares, purchase_price, purchase_date
-        FROM portfolio_items
-        WHERE user_id = ?
-        """, (user_id,))
+        c.execute(PORTFOLIO_ITEMS_QUERY, (user_id,))
         
         portfolio_items = c.fetchall()
         
@@ -218,14 +205,17 @@ def show_dashboard(user_id):
         total_cost = 0
         portfolio_allocation = []
         
+        # Current prices for every holding in one batched request
+        quotes = get_quote_service().get_quotes([item[0] for item in portfolio_items])
+        
         for item in portfolio_items:
             ticker, shares, purchase_price, purchase_date = item
             
             # Get current price
             try:
-                current_data = yf.download(ticker, period="1d")
-                if not current_data.empty:
-                    current_price = safe_float_convert(current_data['Close'].iloc[-1])
+                current_price = quotes.loc[ticker.upper(), 'Price']
+                if not pd.isna(current_price):
+                    current_price = safe_float_convert(current_price)
                     
                     item_cost = shares * purchase_price
                     item_value = shares * current_price
@@ -289,8 +279,27 @@ def show_dashboard(user_id):
                 )
                 
                 st.plotly_chart(fig, use_container_width=True)
-    
-    conn.close()
+        
+        # Portfolio value over time from the stored daily snapshots, which are
+        # maintained by jobs.py and after each trade on the Portfolio page
+        nav = get_portfolio_nav(user_id, conn)
+        
+        if not nav.empty:
+            fig = px.line(
+                nav,
+                y=['Market Value', 'Cost Basis'],
+                title='Portfolio Value'
+            )
+            
+            fig.update_layout(
+                height=300,
+                margin=dict(l=0, r=0, t=40, b=0),
+                legend_title_text='',
+                yaxis_title='Value ($)',
+                xaxis_title=''
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
     
     # Recent news
     st.markdown('<div class="sub-header">Recent Market News</div>', unsafe_allow_html=True)
@@ -1,5 +1,5 @@
 import streamlit as st
-import sqlite3
+from utils.database import get_connection, LOGIN_QUERY
 import hashlib
 import time
 
@@ -25,11 +25,10 @@ def show_login():
                 hashed_password = hashlib.sha256(password.encode()).hexdigest()
                 
                 # Check credentials in database
-                conn = sqlite3.connect('database/stock_analyzer.db')
+                conn = get_connection()
                 c = conn.cursor()
-                c.execute("SELECT id, username FROM users WHERE username = ? AND password = ?", (username, hashed_password))
+                c.execute(LOGIN_QUERY, (username, hashed_password))
                 user = c.fetchone()
-                conn.close()
                 
                 if user:
                     # Set session state
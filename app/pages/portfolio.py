@@ -3,7 +3,15 @@ import pandas as pd
 import numpy as np
 import yfinance as yf
 import plotly.express as px
-import sqlite3
+from utils.database import get_connection
+from utils.indicators import build_price_panel
+from utils.monte_carlo import monte_carlo_risk
+from utils.performance import portfolio_performance
+from utils.portfolio import (
+    load_portfolio, load_transactions, record_transaction, update_portfolio_snapshots, value_portfolio
+)
+from utils.price_store import get_price_store
+from utils.quotes import get_quote_service
 from datetime import datetime, timedelta
 
 st.markdown("""
@@ -57,63 +65,29 @@ def display_portfolio(user_id):
     st.markdown('<div class="sub-header">Your Portfolio</div>', unsafe_allow_html=True)
     
     # Get portfolio data from database
-    conn = sqlite3.connect('database/stock_analyzer.db')
-    c = conn.cursor()
+    conn = get_connection()
     
-    c.execute("""
-    SELECT id, ticker, shares, purchase_price, purchase_date
-    FROM portfolio_items
-    WHERE user_id = ?
-    """, (user_id,))
+    holdings = load_portfolio(user_id, conn)
     
-    portfolio_items = c.fetchall()
-    
-    if not portfolio_items:
+    if holdings.empty:
         st.info("Your portfolio is empty. Add stocks to track your investments.")
-        conn.close()
         return
-    # print("Hello")
-    # Create portfolio dataframe
-    portfolio_data = []
-    total_value = 0
-    total_cost = 0
-    
-    for item in portfolio_items:
-        item_id, ticker, shares, purchase_price, purchase_date = item
-        
-        try:
-            # Get current price
-            current_data = yf.download(ticker, period="1d")
-            if not current_data.empty:
-                current_price = current_data['Close'].iloc[-1][0]
-                
-                cost_basis = shares * purchase_price
-                current_value = shares * current_price
-                gain_loss = current_value - cost_basis
-                gain_loss_pct = (gain_loss / cost_basis) * 100
-                
-                total_value += current_value
-                total_cost += cost_basis
-               
-                portfolio_data.append({
-                    'ID': item_id,
-                    'Ticker': ticker,
-                    'Shares': shares,
-                    'Purchase Price': f"${float(purchase_price):.2f}",
-                    'Current Price': f"${current_price:.2f}",
-                    'Cost Basis': f"${cost_basis:.2f}",
-                    'Current Value': f"${current_value:.2f}",
-                    'Gain/Loss': f"${gain_loss:.2f}",
-                    'Gain/Loss %': f"{gain_loss_pct:.2f}%",
-                    'Purchase Date': purchase_date
-                })
-        except Exception as e:
-            st.error(f"Error fetching data for {ticker}: {e}")
+    
+    # Current prices for every holding in one batched request, then value all positions at once
+    quotes = get_quote_service().get_quotes(holdings['Ticker'])
+    portfolio_df, totals = value_portfolio(holdings, quotes['Price'])
+    
+    unpriced = holdings.loc[~holdings['ID'].isin(portfolio_df['ID']), 'Ticker']
+    for ticker in unpriced:
+        st.error(f"Error fetching data for {ticker}: no price data available")
+    
+    total_value = totals['value']
+    total_cost = totals['cost']
     
     # Display portfolio summary
-    if portfolio_data:
-        total_gain_loss = total_value - total_cost
-        total_gain_loss_pct = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0
+    if not portfolio_df.empty:
+        total_gain_loss = totals['gain_loss']
+        total_gain_loss_pct = totals['gain_loss_pct']
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -151,25 +125,25 @@ def display_portfolio(user_id):
             </div>
             """, unsafe_allow_html=True)
         
-        # Display portfolio table
-        df = pd.DataFrame(portfolio_data)
-        st.dataframe(df, use_container_width=True)
+        # Display portfolio table; numbers stay numeric and are only formatted here
+        table_columns = [
+            'ID', 'Ticker', 'Shares', 'Purchase Price', 'Current Price', 'Cost Basis',
+            'Current Value', 'Gain/Loss', 'Gain/Loss %', 'Purchase Date'
+        ]
+        st.dataframe(
+            portfolio_df[table_columns].style.format({
+                'Purchase Price': "${:.2f}",
+                'Current Price': "${:.2f}",
+                'Cost Basis': "${:.2f}",
+                'Current Value': "${:.2f}",
+                'Gain/Loss': "${:.2f}",
+                'Gain/Loss %': "{:.2f}%",
+            }),
+            use_container_width=True
+        )
         
         # Portfolio allocation pie chart
-        portfolio_allocation = []
-        
-        for item in portfolio_data:
-            ticker = item['Ticker']
-            current_value = float(item['Current Value'].replace('$', ''))
-            allocation_pct = (current_value / total_value) * 100
-            
-            portfolio_allocation.append({
-                'Ticker': ticker,
-                'Value': current_value,
-                'Allocation': allocation_pct
-            })
-        
-        allocation_df = pd.DataFrame(portfolio_allocation)
+        allocation_df = portfolio_df[['Ticker', 'Current Value', 'Allocation']].rename(columns={'Current Value': 'Value'})
         
         fig = px.pie(
             allocation_df,
@@ -193,24 +167,175 @@ def display_portfolio(user_id):
         
         st.plotly_chart(fig, use_container_width=True)
         
+        display_performance(user_id)
+        
+        display_risk_simulation(portfolio_df)
+        
         # Option to remove stocks from portfolio
         st.markdown('<div class="sub-header">Remove from Portfolio</div>', unsafe_allow_html=True)
         
-        ticker_to_remove = st.selectbox("Select Stock to Remove", [item['Ticker'] for item in portfolio_data])
+        ticker_to_remove = st.selectbox("Select Stock to Remove", portfolio_df['Ticker'].tolist())
         
         if st.button("Remove Selected Stock"):
-            # Find the ID of the selected ticker
-            item_id = next((item['ID'] for item in portfolio_data if item['Ticker'] == ticker_to_remove), None)
+            # Find the selected position
+            matches = portfolio_df[portfolio_df['Ticker'] == ticker_to_remove]
             
-            if item_id:
-                # Remove from database
-                c.execute("DELETE FROM portfolio_items WHERE id = ?", (item_id,))
-                conn.commit()
+            if not matches.empty:
+                # Sell the whole position at the current price; the ledger keeps the history
+                position = matches.iloc[0]
+                record_transaction(
+                    user_id, ticker_to_remove, 'SELL', position['Shares'], position['Current Price'],
+                    datetime.now().strftime('%Y-%m-%d')
+                )
+                refresh_portfolio_history(user_id)
                 
                 st.success(f"Removed {ticker_to_remove} from your portfolio!")
                 st.rerun()
+        
+        # Transaction history
+        with st.expander("Transaction History"):
+            transactions = load_transactions(user_id, conn)
+            st.dataframe(
+                transactions.drop(columns='ID').style.format({
+                    'Price': "${:.2f}",
+                    'Realized Gain': lambda value: "" if pd.isna(value) else f"${value:.2f}",
+                }),
+                use_container_width=True
+            )
+
+def refresh_portfolio_history(user_id):
+    """Bring the stored NAV snapshots up to date after a trade (a back-dated one rewrites them)"""
+    with st.spinner("Updating portfolio history..."):
+        try:
+            update_portfolio_snapshots(user_id)
+        except Exception as e:
+            print(f"Error updating portfolio snapshots: {str(e)}")
+
+def display_performance(user_id):
+    st.markdown('<div class="sub-header">Performance</div>', unsafe_allow_html=True)
+    
+    windows = {
+        "1 Month": timedelta(days=30),
+        "3 Months": timedelta(days=91),
+        "1 Year": timedelta(days=365),
+        "All Time": None
+    }
+    window = st.selectbox("Period", list(windows.keys()), index=3)
+    start_date = datetime.now() - windows[window] if windows[window] else None
+    
+    try:
+        performance = portfolio_performance(user_id, start_date=start_date)
+    except Exception as e:
+        st.error(f"Error calculating performance: {e}")
+        return
     
-    conn.close()
+    if performance is None:
+        st.info("Not enough price history to measure performance yet.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    
+    metrics = [
+        (col1, performance['twr'], "Time-Weighted Return"),
+        (col2, performance['annualized_twr'], "Annualized TWR"),
+        (col3, performance['xirr'], "Money-Weighted Return (XIRR)")
+    ]
+    
+    for col, value, label in metrics:
+        with col:
+            color = "positive" if not pd.isna(value) and value >= 0 else "negative"
+            text = "N/A" if pd.isna(value) else f"{value * 100:.2f}%"
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value {color}">{text}</div>
+                <div class="metric-label">{label}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    contributions = (performance['contributions'] * 100).rename('Contribution (%)').reset_index()
+    contributions.columns = ['Ticker', 'Contribution (%)']
+    
+    fig = px.bar(
+        contributions.sort_values('Contribution (%)'),
+        x='Contribution (%)',
+        y='Ticker',
+        orientation='h',
+        title=f"Contribution to Return ({performance['start']:%Y-%m-%d} to {performance['end']:%Y-%m-%d})"
+    )
+    
+    fig.update_layout(
+        height=max(250, 30 * len(contributions)),
+        margin=dict(l=50, r=50, t=80, b=50),
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+def display_risk_simulation(portfolio_df):
+    st.markdown('<div class="sub-header">Risk Simulation</div>', unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        horizons = {"1 Month": 21, "3 Months": 63, "1 Year": 252}
+        horizon = st.selectbox("Horizon", list(horizons.keys()), index=2)
+    
+    with col2:
+        n_paths = st.select_slider("Simulated Paths", options=[1000, 10000, 50000, 100000], value=10000)
+    
+    if not st.button("Run Simulation"):
+        return
+    
+    # Daily returns of the current holdings over the last two years
+    tickers = portfolio_df['Ticker'].str.upper().tolist()
+    end_date = datetime.now()
+    frames = get_price_store().get_prices_batch(tickers, end_date - timedelta(days=730), end_date)
+    returns = build_price_panel(frames, 'Close').sort_index().pct_change().iloc[1:]
+    
+    weights = portfolio_df.groupby(portfolio_df['Ticker'].str.upper())['Current Value'].sum()
+    total_value = weights.sum()
+    
+    try:
+        with st.spinner("Simulating portfolio paths..."):
+            simulation = monte_carlo_risk(returns, weights, n_paths=n_paths, horizon=horizons[horizon], seed=42)
+    except Exception as e:
+        st.error(f"Error running simulation: {e}")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    metrics = [
+        (col1, simulation['VaR'][0.95], "Value at Risk (95%)"),
+        (col2, simulation['CVaR'][0.95], "Expected Shortfall (95%)"),
+        (col3, simulation['VaR'][0.99], "Value at Risk (99%)"),
+        (col4, simulation['drawdown_percentiles'][95], "Max Drawdown (95th pct)")
+    ]
+    
+    for col, loss, label in metrics:
+        with col:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value negative">${loss * total_value:,.2f}</div>
+                <div class="metric-label">{label} ({loss * 100:.1f}%)</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    fig = px.histogram(
+        x=simulation['terminal_returns'] * 100,
+        nbins=100,
+        title=f"Simulated {horizon} Return Distribution"
+    )
+    
+    fig.add_vline(x=-simulation['VaR'][0.95] * 100, line_dash="dash", line_color="red", annotation_text="95% VaR")
+    
+    fig.update_layout(
+        height=400,
+        margin=dict(l=50, r=50, t=80, b=50),
+        xaxis_title="Return (%)",
+        yaxis_title="Paths",
+        showlegend=False
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
 
 def add_to_portfolio(user_id):
     st.markdown('<div class="sub-header">Add to Portfolio</div>', unsafe_allow_html=True)
@@ -247,39 +372,13 @@ def add_to_portfolio(user_id):
                 
                 purchase_price = stock_data.iloc[0]['Close']
                 
-                # Add to database
-                conn = sqlite3.connect('database/stock_analyzer.db')
-                c = conn.cursor()
-                
-                # Check if already exists
-                c.execute("SELECT id FROM portfolio_items WHERE user_id = ? AND ticker = ?", (user_id, ticker))
-                existing = c.fetchone()
-                print("Hello")
-                if existing:
-                    # Update existing entry
-                    print("HEllo 1")
-                    c.execute("""
-                    UPDATE portfolio_items 
-                    SET shares = shares + ?, purchase_price = (purchase_price * shares + ? * ?) / (shares + ?),
-                    updated_at = datetime('now')
-                    WHERE user_id = ? AND ticker = ?
-                    """, (shares, purchase_price[0], shares, shares, user_id, ticker))
-                    
-                    st.success(f"Updated {ticker} in your portfolio!")
-                else:
-                    # Add new entry
-                    # print(shares)
-                    print("Purchase Price : ", purchase_price[0])
-                    
-                    c.execute("""
-                    INSERT INTO portfolio_items (user_id, ticker, shares, purchase_price, purchase_date, created_at)
-                    VALUES (?, ?, ?, ?, ?, datetime('now'))
-                    """, (user_id, ticker, shares, purchase_price[0], purchase_date.strftime('%Y-%m-%d')))
-                    
-                    st.success(f"Added {shares} shares of {ticker} to your portfolio!")
+                # Record the buy; it opens a new lot and updates the position
+                record_transaction(
+                    user_id, ticker, 'BUY', shares, float(purchase_price.iloc[0]), purchase_date.strftime('%Y-%m-%d')
+                )
+                refresh_portfolio_history(user_id)
                 
-                conn.commit()
-                conn.close()
+                st.success(f"Added {shares} shares of {ticker} to your portfolio!")
                 
                 st.rerun()
                 
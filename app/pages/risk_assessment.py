@@ -1,24 +1,17 @@
 import streamlit as st
-import sqlite3
+from utils.database import get_connection, RISK_ASSESSMENT_QUERY
 from datetime import datetime
 
 def show_risk_assessment(user_id):
     st.markdown('<div class="main-header">Risk Tolerance Assessment</div>', unsafe_allow_html=True)
     
     # Check if user already has a risk assessment
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("""
-    SELECT risk_score, risk_profile, risk_description, created_at
-    FROM risk_assessments
-    WHERE user_id = ?
-    ORDER BY created_at DESC
-    LIMIT 1
-    """, (user_id,))
+    c.execute(RISK_ASSESSMENT_QUERY, (user_id,))
     
     risk_assessment = c.fetchone()
-    conn.close()
     
     if risk_assessment:
         # Display current risk profile
@@ -106,7 +99,7 @@ def assess_risk_tolerance(user_id):
             description = "You can tolerate high volatility for potentially high returns. Growth stocks, small caps, and emerging technologies may align with your risk tolerance."
         
         # Save to database
-        conn = sqlite3.connect('database/stock_analyzer.db')
+        conn = get_connection()
         c = conn.cursor()
         
         c.execute("""
@@ -115,7 +108,6 @@ def assess_risk_tolerance(user_id):
         """, (user_id, risk_tolerance_pct, risk_profile, description))
         
         conn.commit()
-        conn.close()
         
         st.success("Risk assessment completed!")
         st.rerun()
@@ -0,0 +1,82 @@
+import time
+import streamlit as st
+from utils.database import get_connection
+from utils.screener import (
+    SCREEN_COLUMNS, FIELD_ALIASES, load_screen_table, screen, update_screener_metrics
+)
+
+def show_screener(user_id):
+    st.markdown('<div class="main-header">Stock Screener</div>', unsafe_allow_html=True)
+
+    conn = get_connection()
+
+    # The screener table is precomputed by the daily job (see jobs.py)
+    table = load_screen_table(conn)
+    if table.empty:
+        st.info("The screener hasn't been built yet. Building it downloads price history for the whole universe and may take a while.")
+        if st.button("Build Screener"):
+            with st.spinner("Computing indicators and risk metrics for the universe..."):
+                try:
+                    count = update_screener_metrics(conn=conn)
+                    st.success(f"Screened {count} stocks.")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error building screener: {str(e)}")
+        return
+
+    st.caption(f"{len(table)} stocks, data as of {table['computed_on'].iloc[0]}")
+
+    query = st.text_input(
+        "Filter",
+        placeholder="e.g. rsi<30 and beta<1 and vol<20%",
+        help="Combine conditions with 'and' / 'or'. A trailing % divides by 100 (vol<20% means 0.2). "
+             f"Fields: {', '.join(SCREEN_COLUMNS)}. Aliases: "
+             + ", ".join(f"{alias}={field}" for alias, field in FIELD_ALIASES.items())
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Sort by", list(SCREEN_COLUMNS)[2:], index=list(SCREEN_COLUMNS).index('rsi') - 2,
+                               format_func=SCREEN_COLUMNS.get)
+    with col2:
+        ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True) == "Ascending"
+    with col3:
+        limit = st.number_input("Max results", min_value=10, max_value=1000, value=50, step=10)
+
+    start = time.perf_counter()
+    try:
+        results = screen(table, query, sort_by=sort_by, ascending=ascending, limit=int(limit))
+    except ValueError as e:
+        st.error(str(e))
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+
+    st.caption(f"{len(results)} matches in {elapsed:.1f} ms")
+
+    if results.empty:
+        st.info("No stocks match the filter.")
+        return
+
+    # Numbers stay numeric and are only formatted here
+    display = results[list(SCREEN_COLUMNS)].rename(columns=SCREEN_COLUMNS)
+    display.index.name = 'Ticker'
+    st.dataframe(
+        display.style.format({
+            'Price': "${:.2f}",
+            'Change (1D)': "{:.2%}",
+            'Volume': "{:,.0f}",
+            'RSI': "{:.1f}",
+            'MA20': "${:.2f}",
+            'MA50': "${:.2f}",
+            'MA200': "${:.2f}",
+            'MACD': "{:.3f}",
+            'Signal Line': "{:.3f}",
+            'Volatility': "{:.2%}",
+            'Sharpe Ratio': "{:.2f}",
+            'Sortino Ratio': "{:.2f}",
+            'Max Drawdown': "{:.2%}",
+            'Beta': "{:.2f}",
+            'Alpha': "{:.2%}",
+        }, na_rep="N/A"),
+        use_container_width=True
+    )
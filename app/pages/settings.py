@@ -1,6 +1,10 @@
 from datetime import datetime
 import streamlit as st
-import sqlite3
+from utils.database import (
+    get_connection, USER_PROFILE_QUERY, PASSWORD_CHECK_QUERY, THEME_QUERY, USER_SETTINGS_ID_QUERY,
+    NOTIFICATION_SETTINGS_QUERY, PORTFOLIO_ITEMS_QUERY, DELETE_USER_ROWS_QUERY
+)
+from utils.portfolio import clear_portfolio
 import hashlib
 import pandas as pd
 
@@ -26,15 +30,14 @@ def show_account_settings(user_id):
     st.markdown('<div class="sub-header">Account Settings</div>', unsafe_allow_html=True)
     
     # Get user information
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("SELECT username, email, full_name FROM users WHERE id = ?", (user_id,))
+    c.execute(USER_PROFILE_QUERY, (user_id,))
     user_data = c.fetchone()
     
     if not user_data:
         st.error("User data not found. Please try logging in again.")
-        conn.close()
         return
     
     username, email, full_name = user_data
@@ -81,7 +84,7 @@ def show_account_settings(user_id):
                 # Verify current password
                 hashed_current = hashlib.sha256(current_password.encode()).hexdigest()
                 
-                c.execute("SELECT id FROM users WHERE id = ? AND password = ?", (user_id, hashed_current))
+                c.execute(PASSWORD_CHECK_QUERY, (user_id, hashed_current))
                 if c.fetchone():
                     # Update password
                     hashed_new = hashlib.sha256(new_password.encode()).hexdigest()
@@ -93,17 +96,15 @@ def show_account_settings(user_id):
                     st.error("Current password is incorrect.")
         else:
             st.error("Please fill in all password fields.")
-    
-    conn.close()
 
 def show_appearance_settings(user_id):
     st.markdown('<div class="sub-header">Appearance Settings</div>', unsafe_allow_html=True)
     
     # Get current theme setting
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("SELECT theme FROM user_settings WHERE user_id = ?", (user_id,))
+    c.execute(THEME_QUERY, (user_id,))
     theme_data = c.fetchone()
     
     current_theme = theme_data[0] if theme_data else 'light'
@@ -115,7 +116,7 @@ def show_appearance_settings(user_id):
         new_theme = theme.lower()
         
         # Check if settings exist
-        c.execute("SELECT id FROM user_settings WHERE user_id = ?", (user_id,))
+        c.execute(USER_SETTINGS_ID_QUERY, (user_id,))
         settings_exist = c.fetchone()
         
         if settings_exist:
@@ -131,8 +132,6 @@ def show_appearance_settings(user_id):
         # Update session state
         st.session_state.theme = new_theme
         st.rerun()
-    
-    conn.close()
 
 def show_data_management(user_id):
     st.markdown('<div class="sub-header">Data Management</div>', unsafe_allow_html=True)
@@ -146,35 +145,28 @@ def show_data_management(user_id):
     """, unsafe_allow_html=True)
     
     if st.button("Clear Portfolio"):
-        conn = sqlite3.connect('database/stock_analyzer.db')
-        c = conn.cursor()
-        c.execute("DELETE FROM portfolio_items WHERE user_id = ?", (user_id,))
-        conn.commit()
-        conn.close()
+        clear_portfolio(user_id)
         st.success("Portfolio cleared!")
     
     if st.button("Clear Watchlist"):
-        conn = sqlite3.connect('database/stock_analyzer.db')
+        conn = get_connection()
         c = conn.cursor()
-        c.execute("DELETE FROM watchlist_items WHERE user_id = ?", (user_id,))
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='watchlist_items'), (user_id,))
         conn.commit()
-        conn.close()
         st.success("Watchlist cleared!")
     
     if st.button("Reset Risk Assessment"):
-        conn = sqlite3.connect('database/stock_analyzer.db')
+        conn = get_connection()
         c = conn.cursor()
-        c.execute("DELETE FROM risk_assessments WHERE user_id = ?", (user_id,))
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='risk_assessments'), (user_id,))
         conn.commit()
-        conn.close()
         st.success("Risk assessment reset!")
     
     if st.button("Clear Chat History"):
-        conn = sqlite3.connect('database/stock_analyzer.db')
+        conn = get_connection()
         c = conn.cursor()
-        c.execute("DELETE FROM chat_messages WHERE user_id = ?", (user_id,))
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='chat_messages'), (user_id,))
         conn.commit()
-        conn.close()
         
         # Clear chat history in session state
         if 'chat_history' in st.session_state:
@@ -189,15 +181,14 @@ def show_data_management(user_id):
         st.success("Chat history cleared!")
     
     if st.button("Reset All Data"):
-        conn = sqlite3.connect('database/stock_analyzer.db')
+        conn = get_connection()
         c = conn.cursor()
-        c.execute("DELETE FROM portfolio_items WHERE user_id = ?", (user_id,))
-        c.execute("DELETE FROM watchlist_items WHERE user_id = ?", (user_id,))
-        c.execute("DELETE FROM risk_assessments WHERE user_id = ?", (user_id,))
-        c.execute("DELETE FROM selected_stocks WHERE user_id = ?", (user_id,))
-        c.execute("DELETE FROM chat_messages WHERE user_id = ?", (user_id,))
+        clear_portfolio(user_id, conn)
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='watchlist_items'), (user_id,))
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='risk_assessments'), (user_id,))
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='selected_stocks'), (user_id,))
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='chat_messages'), (user_id,))
         conn.commit()
-        conn.close()
         
         # Clear session state
         if 'selected_stocks' in st.session_state:
@@ -218,10 +209,8 @@ def show_data_management(user_id):
     st.markdown('<div class="sub-header">Export Data</div>', unsafe_allow_html=True)
     
     if st.button("Export Portfolio Data"):
-        conn = sqlite3.connect('database/stock_analyzer.db')
-        query = "SELECT ticker, shares, purchase_price, purchase_date FROM portfolio_items WHERE user_id = ?"
-        portfolio_df = pd.read_sql_query(query, conn, params=(user_id,))
-        conn.close()
+        conn = get_connection()
+        portfolio_df = pd.read_sql_query(PORTFOLIO_ITEMS_QUERY, conn, params=(user_id,))
         
         if not portfolio_df.empty:
             csv = portfolio_df.to_csv(index=False).encode('utf-8')
@@ -238,10 +227,10 @@ def show_notification_settings(user_id):
     st.markdown('<div class="sub-header">Notification Settings</div>', unsafe_allow_html=True)
     
     # Get current notification settings
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("SELECT email_notifications, price_alerts FROM user_settings WHERE user_id = ?", (user_id,))
+    c.execute(NOTIFICATION_SETTINGS_QUERY, (user_id,))
     notification_data = c.fetchone()
     
     email_notifications = notification_data[0] if notification_data and notification_data[0] is not None else 1
@@ -260,7 +249,7 @@ def show_notification_settings(user_id):
     
     if st.button("Save Notification Settings"):
         # Check if settings exist
-        c.execute("SELECT id FROM user_settings WHERE user_id = ?", (user_id,))
+        c.execute(USER_SETTINGS_ID_QUERY, (user_id,))
         settings_exist = c.fetchone()
         
         if settings_exist:
@@ -277,5 +266,3 @@ def show_notification_settings(user_id):
         
         conn.commit()
         st.success("Notification settings updated successfully!")
-    
-    conn.close()
@@ -1,5 +1,5 @@
 import streamlit as st
-import sqlite3
+from utils.database import get_connection, USER_EXISTS_QUERY
 import hashlib
 import time
 import re
@@ -36,13 +36,12 @@ def show_signup():
                 error_placeholder.error("Please enter a valid email address.")
             else:
                 # Check if username or email already exists
-                conn = sqlite3.connect('database/stock_analyzer.db')
+                conn = get_connection()
                 c = conn.cursor()
-                c.execute("SELECT id FROM users WHERE username = ? OR email = ?", (username, email))
+                c.execute(USER_EXISTS_QUERY, (username, email))
                 existing_user = c.fetchone()
                 
                 if existing_user:
-                    conn.close()
                     error_placeholder.error("Username or email already exists. Please choose another.")
                 else:
                     # Hash the password
@@ -58,7 +57,6 @@ def show_signup():
                     user_id = c.lastrowid
                     
                     conn.commit()
-                    conn.close()
                     
                     # Set session state
                     st.session_state.user_id = user_id
@@ -5,8 +5,11 @@ import yfinance as yf
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import sqlite3
-from utils.stock_utils import get_company_logo, get_stock_news
+from utils.database import (
+    get_connection, RISK_SCORE_QUERY, SELECTED_STOCKS_QUERY, DELETE_SELECTED_STOCK_QUERY,
+    PORTFOLIO_ITEM_ID_QUERY, WATCHLIST_ITEM_ID_QUERY
+)
+from utils.stock_utils import get_company_logo, get_stock_news, fetch_parallel, DEFAULT_LOGO_URL
 from utils.stock_analyzer import StockAnalyzer
 
 def show_stock_analysis(user_id):
@@ -58,10 +61,10 @@ def show_stock_analysis(user_id):
         st.session_state.analyzer = StockAnalyzer()
     
     # Get user's selected stocks from database
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("SELECT ticker FROM selected_stocks WHERE user_id = ?", (user_id,))
+    c.execute(SELECTED_STOCKS_QUERY, (user_id,))
     selected_stocks_db = [row[0] for row in c.fetchall()]
     
     # Initialize selected_stocks in session state if not already done
@@ -135,7 +138,7 @@ def show_stock_analysis(user_id):
                     st.session_state.selected_stocks.remove(ticker)
                     
                     # Remove from database
-                    c.execute("DELETE FROM selected_stocks WHERE user_id = ? AND ticker = ?", (user_id, ticker))
+                    c.execute(DELETE_SELECTED_STOCK_QUERY, (user_id, ticker))
             
             conn.commit()
             st.success("Removed selected stocks from analysis!")
@@ -143,7 +146,6 @@ def show_stock_analysis(user_id):
         
         if not st.session_state.selected_stocks:
             st.warning("Please add stocks to analyze.")
-            conn.close()
             return
     else:
         # Single stock mode
@@ -151,51 +153,60 @@ def show_stock_analysis(user_id):
             selected_tickers = [ticker_input.strip().upper()]
         else:
             st.warning("Please enter a stock ticker.")
-            conn.close()
             return
     
-    conn.close()
-    
     # Fetch data and perform analysis
     start_date_str = start_date.strftime('%Y-%m-%d')
     end_date_str = end_date.strftime('%Y-%m-%d')
     
-    # Fetch benchmark data (S&P 500)
-    benchmark_data = st.session_state.analyzer.fetch_stock_data('^GSPC', start_date_str, end_date_str)
-    benchmark_data = st.session_state.analyzer.calculate_technical_indicators(benchmark_data)
+    # Fetch the selected stocks and the benchmark (S&P 500) in one grouped request
+    with st.spinner("Fetching price data..."):
+        price_data = st.session_state.analyzer.fetch_stock_data_batch(
+            ['^GSPC'] + selected_tickers, start_date_str, end_date_str
+        )
+    
+    # Indicators for the benchmark and every selected stock in one vectorized pass
+    analyzed_data = st.session_state.analyzer.calculate_technical_indicators_batch(price_data)
+    benchmark_data = analyzed_data.get('^GSPC')
+    
+    # Fetch fundamentals (plus logo and news in single stock mode) in parallel
+    fetch_calls = {}
+    for ticker in selected_tickers:
+        if price_data[ticker] is not None:
+            fetch_calls[('fundamentals', ticker)] = (st.session_state.analyzer.fetch_fundamental_data, (ticker,), {})
+    
+    if not compare_mode:
+        fetch_calls[('logo', selected_tickers[0])] = (get_company_logo, (selected_tickers[0],), DEFAULT_LOGO_URL)
+        fetch_calls[('news', selected_tickers[0])] = (get_stock_news, (selected_tickers[0],), [])
+    
+    with st.spinner("Fetching company data..."):
+        fetched = fetch_parallel(fetch_calls)
     
-    # Fetch and analyze selected stocks
+    # Analyze selected stocks
     tickers_data = {}
-    tickers_risk_metrics = {}
     tickers_fundamentals = {}
     
     for ticker in selected_tickers:
-        with st.spinner(f"Analyzing {ticker}..."):
-            # Fetch stock data
-            data = st.session_state.analyzer.fetch_stock_data(ticker, start_date_str, end_date_str)
-            
-            if data is None or data.empty:
-                st.error(f"No data available for {ticker}. Please check the ticker symbol and date range.")
-                continue
-            
-            # Calculate technical indicators
-            data = st.session_state.analyzer.calculate_technical_indicators(data)
-            
-            # Calculate risk metrics
-            risk_metrics = st.session_state.analyzer.calculate_risk_metrics(data, benchmark_data)
-            
-            # Fetch fundamental data
-            fundamentals = st.session_state.analyzer.fetch_fundamental_data(ticker)
-            
-            # Store data for comparison
-            tickers_data[ticker] = data
-            tickers_risk_metrics[ticker] = risk_metrics
-            tickers_fundamentals[ticker] = fundamentals
+        data = analyzed_data.get(ticker)
+        
+        if data is None:
+            st.error(f"No data available for {ticker}. Please check the ticker symbol and date range.")
+            continue
+        
+        fundamentals = fetched[('fundamentals', ticker)]
+        
+        # Store data for comparison
+        tickers_data[ticker] = data
+        tickers_fundamentals[ticker] = fundamentals
     
     if not tickers_data:
         st.error("No valid data available for the selected stocks. Please check your inputs and try again.")
         return
     
+    # Calculate risk metrics for all tickers against the benchmark at once
+    risk_table = st.session_state.analyzer.calculate_risk_metrics_batch(tickers_data, benchmark_data)
+    tickers_risk_metrics = {ticker: risk_table.loc[ticker].to_dict() for ticker in tickers_data}
+    
     # Display analysis
     if compare_mode:
         # Comparative analysis
@@ -254,7 +265,7 @@ def show_stock_analysis(user_id):
         col1, col2 = st.columns([1, 3])
         
         with col1:
-            logo_url = get_company_logo(ticker)
+            logo_url = fetched[('logo', ticker)]
             st.image(logo_url, width=80)
         
         with col2:
@@ -621,11 +632,10 @@ def show_stock_analysis(user_id):
                 """, unsafe_allow_html=True)
             
             # Get user's risk profile from database
-            conn = sqlite3.connect('database/stock_analyzer.db')
+            conn = get_connection()
             c = conn.cursor()
-            c.execute("SELECT risk_score, risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
+            c.execute(RISK_SCORE_QUERY, (user_id,))
             risk_data = c.fetchone()
-            conn.close()
             
             # Risk assessment
             if risk_data:
@@ -718,7 +728,7 @@ def show_stock_analysis(user_id):
             # News
             st.markdown('<div class="sub-header">Recent News</div>', unsafe_allow_html=True)
             
-            news = get_stock_news(ticker)
+            news = fetched[('news', ticker)]
             
             if news:
                 for item in news:
@@ -759,9 +769,9 @@ def show_stock_analysis(user_id):
         with col1:
             if st.button("Add to Portfolio"):
                 # Check if already in portfolio
-                conn = sqlite3.connect('database/stock_analyzer.db')
+                conn = get_connection()
                 c = conn.cursor()
-                c.execute("SELECT id FROM portfolio_items WHERE user_id = ? AND ticker = ?", (user_id, ticker))
+                c.execute(PORTFOLIO_ITEM_ID_QUERY, (user_id, ticker))
                 existing = c.fetchone()
                 
                 if existing:
@@ -771,15 +781,13 @@ def show_stock_analysis(user_id):
                     st.session_state.add_to_portfolio = ticker
                     st.session_state.page = "Portfolio"
                     st.experimental_rerun()
-                
-                conn.close()
         
         with col2:
             if st.button("Add to Watchlist"):
                 # Check if already in watchlist
-                conn = sqlite3.connect('database/stock_analyzer.db')
+                conn = get_connection()
                 c = conn.cursor()
-                c.execute("SELECT id FROM watchlist_items WHERE user_id = ? AND ticker = ?", (user_id, ticker))
+                c.execute(WATCHLIST_ITEM_ID_QUERY, (user_id, ticker))
                 existing = c.fetchone()
                 
                 if existing:
@@ -792,8 +800,6 @@ def show_stock_analysis(user_id):
                     """, (user_id, ticker))
                     conn.commit()
                     st.success(f"Added {ticker} to your watchlist!")
-                
-                conn.close()
         
         with col3:
             if st.button("Download Data"):
@@ -2,7 +2,8 @@ from datetime import datetime
 import streamlit as st
 import pandas as pd
 import yfinance as yf
-import sqlite3
+from utils.database import get_connection, USER_EMAIL_QUERY, WATCHLIST_ITEM_ID_QUERY, WATCHLIST_QUERY
+from utils.quotes import get_quote_service
 from utils.stock_utils import get_company_logo
 import smtplib
 from email.message import EmailMessage
@@ -82,11 +83,10 @@ def send_watchlist_email(to_email, ticker):
         smtp.send_message(msg)
 
 def show_watchlist(user_id):
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT email FROM users WHERE id = ?", (user_id,))
+    c.execute(USER_EMAIL_QUERY, (user_id,))
     user_email = c.fetchone()[0]
-    conn.close()
 
     st.markdown('<div class="main-header">Watchlist</div>', unsafe_allow_html=True)
     
@@ -103,17 +103,12 @@ def display_watchlist(user_id):
     st.markdown('<div class="sub-header">Your Watchlist</div>', unsafe_allow_html=True)
     
     # Get watchlist from database
-    conn = sqlite3.connect('database/stock_analyzer.db')
+    conn = get_connection()
     c = conn.cursor()
     
-    c.execute("""
-    SELECT id, ticker, added_at
-    FROM watchlist_items
-    WHERE user_id = ?
-    """, (user_id,))
+    c.execute(WATCHLIST_QUERY, (user_id,))
     
     watchlist_items = c.fetchall()
-    conn.close()
     
     if not watchlist_items:
         st.info("Your watchlist is empty. Add stocks to track them.")
@@ -122,16 +117,17 @@ def display_watchlist(user_id):
     # Fetch current data for watchlist stocks
     watchlist_data = []
     
+    # Current and previous close for every watched stock in one batched request
+    quotes = get_quote_service().get_quotes([item[1] for item in watchlist_items])
+    
     for item in watchlist_items:
         item_id, ticker, added_at = item
         
         try:
             # Get current price data
-            current_data = yf.download(ticker, period="2d")
+            current_price, prev_price = quotes.loc[ticker.upper()]
             
-            if not current_data.empty and len(current_data) >= 2:
-                current_price = current_data['Close'].iloc[-1]
-                prev_price = current_data['Close'].iloc[-2]
+            if not pd.isna(current_price) and not pd.isna(prev_price):
                 price_change = current_price - prev_price
                 price_change_pct = (price_change / prev_price) * 100
                 
@@ -166,8 +162,8 @@ def display_watchlist(user_id):
         
         with col:
             
-            change_color = "positive" if (stock['Change']).any() else "negative"
-            change_icon = "↑" if (stock['Change']).any() else "↓"
+            change_color = "positive" if stock['Change'] >= 0 else "negative"
+            change_icon = "↑" if stock['Change'] >= 0 else "↓"
             
             st.markdown(f"""
             <div class="card">
@@ -189,11 +185,10 @@ def display_watchlist(user_id):
         
         if item_id:
             # Remove from database
-            conn = sqlite3.connect('database/stock_analyzer.db')
+            conn = get_connection()
             c = conn.cursor()
             c.execute("DELETE FROM watchlist_items WHERE id = ?", (item_id,))
             conn.commit()
-            conn.close()
             
             st.success(f"Removed {ticker_to_remove} from your watchlist!")
             st.rerun()
@@ -214,10 +209,10 @@ def add_to_watchlist(user_id, user_email):
                     return
                 
                 # Check if already in watchlist
-                conn = sqlite3.connect('database/stock_analyzer.db')
+                conn = get_connection()
                 c = conn.cursor()
                 
-                c.execute("SELECT id FROM watchlist_items WHERE user_id = ? AND ticker = ?", (user_id, ticker))
+                c.execute(WATCHLIST_ITEM_ID_QUERY, (user_id, ticker))
                 existing = c.fetchone()
                 
                 if existing:
@@ -230,9 +225,8 @@ def add_to_watchlist(user_id, user_email):
                     """, (user_id, ticker))
                     conn.commit()
                     # Fetch user email
-                    c.execute("SELECT email FROM users WHERE id = ?", (user_id,))
+                    c.execute(USER_EMAIL_QUERY, (user_id,))
                     user_email = c.fetchone()[0]
-                    conn.close()
                     # Send notification email
                     send_watchlist_email(user_email, ticker)
                     # Show success message
@@ -0,0 +1,31 @@
+import time
+
+import streamlit as st
+
+from utils.database import init_db
+
+CSS_PATH = "static/css/style.css"
+
+@st.cache_resource(show_spinner=False)
+def bootstrap():
+    """Run one-time process setup (schema migrations, static assets) and return the results.
+
+    Streamlit re-executes main.py on every interaction; cache_resource keeps this
+    to once per server process. Returns a dict with the page CSS and the time
+    each step took, which is also printed as a startup report.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    init_db()
+    timings['init_db'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(CSS_PATH) as f:
+        css = f.read()
+    timings['load_css'] = time.perf_counter() - start
+
+    report = ", ".join(f"{step} {seconds * 1000:.1f} ms" for step, seconds in timings.items())
+    print(f"Startup: {report}")
+
+    return {'css': css, 'timings': timings}
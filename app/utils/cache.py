@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry, meant to be shared by all sessions.
+
+    Entries older than ttl seconds are treated as missing, and the least recently
+    used entry is evicted once more than maxsize are stored. get_or_compute makes
+    concurrent callers asking for the same missing key wait for a single
+    computation instead of each running it.
+    """
+
+    def __init__(self, maxsize=256, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key, default):
+        """Return a fresh entry's value (marking it recently used); caller holds the lock"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if time.monotonic() - entry[0] >= self.ttl:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        missing = object()
+        with self._lock:
+            value = self._lookup(key, missing)
+            if value is missing:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() once to fill it if needed.
+
+        Exceptions raised by compute() propagate and nothing is cached.
+        """
+        missing = object()
+
+        with self._lock:
+            value = self._lookup(key, missing)
+            if value is not missing:
+                self.hits += 1
+                return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another caller may have filled the entry while we waited
+            with self._lock:
+                value = self._lookup(key, missing)
+                if value is not missing:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+
+            try:
+                value = compute()
+                self.set(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
@@ -1,15 +1,37 @@
-import numpy as np
-import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
+import math
 import re
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.price_store import get_price_store
+from utils.cache import TTLCache
+from utils.indicators import calculate_indicator_panel, calculate_signal_panel
+from utils.quotes import get_quote_service
+from utils.screener import load_universe
+
+# Stock analyses shared by every chatbot session in the process
+ANALYSIS_CACHE = TTLCache(maxsize=500, ttl=3600)
+
+# Company info kept with each cached analysis for the chat response
+ANALYSIS_INFO_FIELDS = ['shortName', 'sector', 'industry', 'trailingPE', 'marketCap', 'dividendYield']
+
+# Market sentiment is shared by all sessions and refreshed in the background once
+# older than SENTIMENT_TTL seconds; a value older than SENTIMENT_MAX_AGE is dropped
+SENTIMENT_TTL = 900
+SENTIMENT_MAX_AGE = 86400
+SENTIMENT_CACHE = TTLCache(maxsize=1, ttl=SENTIMENT_MAX_AGE)
+_sentiment_refresh_lock = threading.Lock()
+
+# Bounded pool shared by all sessions for scoring recommendation candidates
+SCORING_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stock-scoring")
 
 class StockChatbotModel:
     def __init__(self):
         """Initialize the improved chatbot model without heavy training"""
-        self.stock_data_cache = {}
-        self.market_sentiment = self._get_market_sentiment()
+        self.stock_data_cache = ANALYSIS_CACHE
         self.popular_stocks = {
             'tech': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'TSLA', 'NVDA'],
             'finance': ['JPM', 'BAC', 'WFC', 'C', 'GS', 'MS', 'V', 'MA'],
@@ -20,15 +42,52 @@ class StockChatbotModel:
             'dividend': ['T', 'VZ', 'MO', 'PM', 'O', 'XOM', 'JNJ'],
             'growth': ['TSLA', 'NVDA', 'SHOP', 'SQ', 'ROKU', 'DDOG', 'NET']
         }
+        # Tickers recognized in questions without looking them up
+        self.known_tickers = {ticker for stocks in self.popular_stocks.values() for ticker in stocks}
+        try:
+            self.known_tickers.update(load_universe().index)
+        except Exception as e:
+            print(f"Error loading stock universe: {str(e)}")
+        # Warm the shared sentiment so it is usually ready by the first question
+        if SENTIMENT_CACHE.get('market') is None:
+            self.refresh_market_sentiment()
         print("Chatbot model initialized successfully!")
     
+    @property
+    def market_sentiment(self):
+        """Current market sentiment shared across sessions, without waiting on a download.
+        
+        A stale or missing value starts a background refresh and the last known
+        value is returned meanwhile ("neutral" until the first refresh finishes).
+        """
+        entry = SENTIMENT_CACHE.get('market')
+        if entry is None or time.monotonic() - entry[1] >= SENTIMENT_TTL:
+            self.refresh_market_sentiment()
+        return entry[0] if entry is not None else "neutral"
+    
+    def refresh_market_sentiment(self, background=True):
+        """Recompute market sentiment, by default on a daemon thread so callers never block"""
+        if not _sentiment_refresh_lock.acquire(blocking=False):
+            return  # A refresh is already running
+        
+        def refresh():
+            try:
+                SENTIMENT_CACHE.set('market', (self._get_market_sentiment(), time.monotonic()))
+            finally:
+                _sentiment_refresh_lock.release()
+        
+        if background:
+            threading.Thread(target=refresh, name="market-sentiment-refresh", daemon=True).start()
+        else:
+            refresh()
+    
     def _get_market_sentiment(self):
         """Get overall market sentiment based on major indices"""
         try:
             # Get S&P 500 data for the last week
             end_date = datetime.now()
             start_date = end_date - timedelta(days=7)
-            sp500 = yf.download('^GSPC', start=start_date, end=end_date)
+            sp500 = get_price_store().get_prices('^GSPC', start_date, end_date)
             
             if sp500.empty:
                 return "neutral"
@@ -48,45 +107,8 @@ class StockChatbotModel:
     def analyze_stock(self, ticker):
         """Analyze a stock and return recommendation with error handling"""
         try:
-            # Check cache first
-            if ticker in self.stock_data_cache and (datetime.now() - self.stock_data_cache[ticker]['timestamp']).seconds < 3600:
-                return self.stock_data_cache[ticker]['analysis']
-            
-            # Get recent data
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=180)  # Use 6 months of data
-            data = yf.download(ticker, start=start_date, end=end_date)
-            
-            if data.empty or len(data) < 30:
-                return {
-                    'recommendation': 'Neutral',
-                    'confidence': 0.5,
-                    'reason': 'Not enough historical data available for analysis'
-                }
-            
-            # Get stock info
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            # Calculate technical indicators
-            data = self._calculate_indicators(data)
-            
-            # Generate recommendation based on technical indicators
-            recommendation, confidence, reason = self._generate_recommendation(data, ticker, info)
-            
-            # Cache the result
-            analysis = {
-                'recommendation': recommendation,
-                'confidence': confidence,
-                'reason': reason
-            }
-            
-            self.stock_data_cache[ticker] = {
-                'timestamp': datetime.now(),
-                'analysis': analysis
-            }
-            
-            return analysis
+            # Shared across sessions, so concurrent requests for a ticker trigger one download
+            return self.stock_data_cache.get_or_compute(ticker, lambda: self._analyze_stock_uncached(ticker))
             
         except Exception as e:
             print(f"Error analyzing {ticker}: {str(e)}")
@@ -96,44 +118,56 @@ class StockChatbotModel:
                 'reason': f"Error analyzing stock: {str(e)}"
             }
     
+    def _analyze_stock_uncached(self, ticker):
+        """Download recent data for a stock and build its recommendation"""
+        # Get recent data
+        start_date, end_date = self._analysis_window()
+        data = get_price_store().get_prices(ticker, start_date, end_date)
+        
+        if data.empty or len(data) < 30:
+            return {
+                'recommendation': 'Neutral',
+                'confidence': 0.5,
+                'reason': 'Not enough historical data available for analysis',
+                'info': {}
+            }
+        
+        # Get stock info
+        stock = yf.Ticker(ticker)
+        info = stock.info
+        
+        # Calculate technical indicators
+        data = self._calculate_indicators(data)
+        
+        # Generate recommendation based on technical indicators
+        recommendation, confidence, reason = self._generate_recommendation(data, ticker, info)
+        
+        return {
+            'recommendation': recommendation,
+            'confidence': confidence,
+            'reason': reason,
+            'info': {key: info[key] for key in ANALYSIS_INFO_FIELDS if info.get(key) is not None}
+        }
+    
+    def _analysis_window(self):
+        """Date range used for stock analysis (6 months up to today)"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=180)
+        return start_date, end_date
+    
     def _calculate_indicators(self, data):
         """Calculate technical indicators for stock analysis"""
-        # RSI
-        delta = data['Close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-        # Align gain and loss to data's index
-        gain, loss = gain.align(data.index, axis=0, fill_value=np.nan)
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
-
-        # Moving Averages
-        data['MA50'] = data['Close'].rolling(window=50).mean()
-        data['MA200'] = data['Close'].rolling(window=200).mean()
-        data['MA_Signal'] = (data['MA50'] > data['MA200']).astype(int)
-
-        # MACD
-        data['EMA12'] = data['Close'].ewm(span=12, adjust=False).mean()
-        data['EMA26'] = data['Close'].ewm(span=26, adjust=False).mean()
-        data['MACD'] = data['EMA12'] - data['EMA26']
-        data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-
-        # Bollinger Bands
-        data['MA20'] = data['Close'].rolling(window=20).mean()
-        data['STD20'] = data['Close'].rolling(window=20).std()
-        data['Upper_Band'] = data['MA20'] + (data['STD20'] * 2)
-        data['Lower_Band'] = data['MA20'] - (data['STD20'] * 2)
-
-        # BB Signal
-        data['BB_Signal'] = 0
-        # Use .loc with index alignment
-        data.loc[data['Close'] > data['Upper_Band'], 'BB_Signal'] = -1  # Overbought
-        data.loc[data['Close'] < data['Lower_Band'], 'BB_Signal'] = 1   # Oversold
-
-        # Volume Signal
-        data['Volume_MA50'] = data['Volume'].rolling(window=50).mean()
-        data['Volume_Signal'] = (data['Volume'] > data['Volume_MA50']).astype(int)
-
+        close = data['Close'].to_frame('value')
+        volume = data['Volume'].to_frame('value')
+        
+        # Same engine as StockAnalyzer (and IndicatorState for incremental updates)
+        panel = calculate_indicator_panel(close, volume)
+        panel.update(calculate_signal_panel(close, volume, panel))
+        
+        for column in ['RSI', 'MA50', 'MA200', 'MA_Signal', 'EMA12', 'EMA26', 'MACD', 'Signal_Line',
+                       'MA20', 'STD20', 'Upper_Band', 'Lower_Band', 'BB_Signal', 'Volume_MA50', 'Volume_Signal']:
+            data[column] = panel[column]['value']
+        
         return data
     
     def _generate_recommendation(self, data, ticker, info):
@@ -238,11 +272,20 @@ class StockChatbotModel:
             
             # Shuffle to get different recommendations each time
             random.shuffle(universe)
+            candidates = universe[:min(10, len(universe))]  # Analyze up to 10 stocks
+            
+            # Warm the price store for the whole universe with one grouped download
+            start_date, end_date = self._analysis_window()
+            get_price_store().get_prices_batch(candidates, start_date, end_date)
             
-            # Analyze top stocks
+            # Score candidates concurrently, stopping once enough are high-confidence
             recommendations = []
-            for ticker in universe[:min(10, len(universe))]:  # Analyze up to 10 stocks
-                analysis = self.analyze_stock(ticker)
+            strong_buys = 0
+            futures = {SCORING_EXECUTOR.submit(self.analyze_stock, ticker): ticker for ticker in candidates}
+            
+            for future in as_completed(futures):
+                ticker = futures[future]
+                analysis = future.result()
                 if analysis['recommendation'] in ['Strong Buy', 'Buy']:
                     recommendations.append({
                         'ticker': ticker,
@@ -250,6 +293,13 @@ class StockChatbotModel:
                         'confidence': analysis['confidence'],
                         'reason': analysis['reason']
                     })
+                
+                if analysis['recommendation'] == 'Strong Buy':
+                    strong_buys += 1
+                    if strong_buys >= count:
+                        for pending in futures:
+                            pending.cancel()
+                        break
             
             # Sort by confidence
             recommendations.sort(key=lambda x: x['confidence'], reverse=True)
@@ -260,8 +310,32 @@ class StockChatbotModel:
             print(f"Error getting recommendations: {str(e)}")
             return []
     
+    def _find_ticker(self, candidates, typed_tickers):
+        """First candidate that is a real ticker, without a download per word.
+
+        Known tickers and ones already in the price store are recognized
+        directly; other words are only looked up if they were typed in capitals.
+        """
+        price_store = get_price_store()
+        stored = price_store.stored_tickers(candidates)
+        for ticker in candidates:
+            if ticker in self.known_tickers or ticker in stored:
+                return ticker
+        
+        start_date, end_date = self._analysis_window()
+        for ticker in candidates:
+            if ticker in typed_tickers:
+                try:
+                    # Downloads into the price store, so the analysis reuses it
+                    if not price_store.get_prices(ticker, start_date, end_date).empty:
+                        return ticker
+                except Exception:
+                    continue
+        return None
+    
     def process_query(self, query, user_risk_profile="Moderate"):
         """Process a user query and generate a response"""
+        typed_tickers = set(re.findall(r'\b([A-Z]{1,5})\b', query))
         query = query.lower()
         
         # Check for stock analysis request
@@ -273,16 +347,11 @@ class StockChatbotModel:
         potential_tickers = [ticker.upper() for ticker in stock_matches if ticker.lower() not in common_words]
         
         # Check for specific stock analysis
-        for ticker in potential_tickers:
-            if any(keyword in query for keyword in ["analyze", "analysis", "think of", "opinion on", "should i buy", "recommend"]):
-                try:
-                    # Validate ticker
-                    stock_data = yf.download(ticker, period="1d")
-                    if not stock_data.empty:
-                        analysis = self.analyze_stock(ticker)
-                        return self._format_stock_analysis(ticker, analysis)
-                except:
-                    continue
+        if potential_tickers and any(keyword in query for keyword in ["analyze", "analysis", "think of", "opinion on", "should i buy", "recommend"]):
+            ticker = self._find_ticker(potential_tickers, typed_tickers)
+            if ticker:
+                analysis = self.analyze_stock(ticker)
+                return self._format_stock_analysis(ticker, analysis)
         
         # Check for recommendation requests
         if any(keyword in query for keyword in ["recommend", "suggestion", "what should i buy", "what to invest in"]):
@@ -317,21 +386,21 @@ class StockChatbotModel:
     def _format_stock_analysis(self, ticker, analysis):
         """Format stock analysis as a readable response"""
         try:
-            # Get additional stock info
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            # Company info comes with the cached analysis, the price from the shared quote cache
+            info = analysis.get('info', {})
             company_name = info.get('shortName', ticker)
             sector = info.get('sector', 'Unknown sector')
             industry = info.get('industry', 'Unknown industry')
             
-            # Get current price
-            current_data = yf.download(ticker, period="1d")
-            current_price = current_data['Close'].iloc[-1] if not current_data.empty else "Unknown"
+            current_price, _ = get_quote_service().get_quote(ticker)
             
             # Format response
             response = f"## Analysis of {company_name} ({ticker})\n\n"
             response += f"*Sector:* {sector} | *Industry:* {industry}\n\n"
-            response += f"*Current Price:* ${current_price:.2f}\n\n"
+            if not math.isnan(current_price):
+                response += f"*Current Price:* ${current_price:.2f}\n\n"
+            else:
+                response += "*Current Price:* Unknown\n\n"
             response += f"*Recommendation:* {analysis['recommendation']}\n"
             response += f"*Confidence:* {analysis['confidence']*100:.1f}%\n\n"
             response += f"*Analysis:* {analysis['reason']}\n\n"
@@ -389,15 +458,14 @@ class StockChatbotModel:
     
     def _format_market_sentiment(self):
         """Format market sentiment as a readable response"""
-        # Refresh market sentiment
-        self.market_sentiment = self._get_market_sentiment()
+        market_sentiment = self.market_sentiment
         
         response = "## Current Market Sentiment\n\n"
         
-        if self.market_sentiment == "bullish":
+        if market_sentiment == "bullish":
             response += "The overall market sentiment appears *bullish* at the moment. Major indices have shown positive momentum over the past week.\n\n"
             response += "In bullish markets, growth stocks and cyclical sectors often perform well. Consider looking at technology, consumer discretionary, and industrial sectors for opportunities.\n\n"
-        elif self.market_sentiment == "bearish":
+        elif market_sentiment == "bearish":
             response += "The overall market sentiment appears *bearish* at the moment. Major indices have shown negative momentum over the past week.\n\n"
             response += "In bearish markets, defensive sectors often outperform. Consider looking at utilities, consumer staples, and healthcare for more stability. Dividend-paying stocks may also provide income during market downturns.\n\n"
         else:
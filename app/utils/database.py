@@ -1,15 +1,54 @@
 import sqlite3
 import os
+import threading
 
-def init_db():
-    """Initialize the database with required tables if they don't exist"""
-    # Create database directory if it doesn't exist
-    os.makedirs('database', exist_ok=True)
+DB_PATH = 'database/stock_analyzer.db'
+
+# Connection settings applied to every connection handed out by get_connection
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 20000
+MMAP_SIZE = 256 * 1024 * 1024
+
+_local = threading.local()
+
+def get_connection(db_path=DB_PATH):
+    """Return this thread's reusable connection to the database.
     
-    # Connect to database
-    conn = sqlite3.connect('database/stock_analyzer.db')
-    c = conn.cursor()
+    Connections are opened once per thread and configured for concurrent use
+    (WAL journal, NORMAL sync, busy timeout, larger page cache and mmap). Callers
+    commit their own writes and must not close the returned connection.
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    
+    conn = connections.get(db_path)
+    if conn is not None:
+        try:
+            conn.total_changes  # Raises if the connection was closed
+            return conn
+        except sqlite3.ProgrammingError:
+            pass
     
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    _configure_connection(conn)
+    connections[db_path] = conn
+    return conn
+
+def _configure_connection(conn):
+    """Apply the pragmas used by every pooled connection"""
+    c = conn.cursor()
+    c.execute("PRAGMA journal_mode = WAL")
+    c.execute("PRAGMA synchronous = NORMAL")
+    c.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    c.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    c.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    c.execute("PRAGMA temp_store = MEMORY")
+    c.close()
+
+def _create_core_tables(c):
+    """Migration 1: user, portfolio, watchlist, risk, settings and chat tables plus the demo user"""
     # Create users table
     c.execute('''
     CREATE TABLE IF NOT EXISTS users (
@@ -102,7 +141,7 @@ def init_db():
         FOREIGN KEY (user_id) REFERENCES users (id)
     )
     ''')
-    
+
     # Create demo user if it doesn't exist
     c.execute("SELECT id FROM users WHERE username = 'demo_user'")
     if not c.fetchone():
@@ -113,6 +152,339 @@ def init_db():
         INSERT INTO users (username, password, email, full_name, created_at)
         VALUES (?, ?, ?, ?, datetime('now'))
         ''', ('demo_user', hashed_password, 'demo@example.com', 'Demo User'))
+
+def _create_user_indexes(c):
+    """Migration 2: indexes behind the per-user queries"""
+    c.execute('''
+    CREATE INDEX IF NOT EXISTS idx_risk_assessments_user_created
+    ON risk_assessments (user_id, created_at DESC)
+    ''')
+    
+    c.execute('''
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_user_timestamp
+    ON chat_messages (user_id, timestamp)
+    ''')
+
+def _create_price_tables(c):
+    """Migration 3: local daily price cache used by PriceStore"""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS price_history (
+        ticker TEXT NOT NULL,
+        date TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (ticker, date)
+    ) WITHOUT ROWID
+    ''')
+    
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS price_coverage (
+        ticker TEXT PRIMARY KEY,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        updated_at TIMESTAMP NOT NULL
+    )
+    ''')
+
+def _create_portfolio_snapshots(c):
+    """Migration 4: daily portfolio value history"""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        market_value REAL NOT NULL,
+        cost_basis REAL NOT NULL,
+        last_transaction_id INTEGER NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (user_id, date),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    ) WITHOUT ROWID
+    ''')
+
+def _create_transaction_ledger(c):
+    """Migration 5: append-only portfolio transactions and the lots they open.
+    
+    portfolio_items becomes the materialized positions table maintained from
+    the ledger; existing rows are carried over as one opening buy each.
+    """
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS portfolio_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        ticker TEXT NOT NULL,
+        side TEXT NOT NULL CHECK (side IN ('BUY', 'SELL')),
+        shares REAL NOT NULL,
+        price REAL NOT NULL,
+        trade_date TEXT NOT NULL,
+        realized_gain REAL,
+        created_at TIMESTAMP NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS portfolio_lots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        ticker TEXT NOT NULL,
+        transaction_id INTEGER NOT NULL,
+        shares REAL NOT NULL,
+        remaining_shares REAL NOT NULL,
+        price REAL NOT NULL,
+        trade_date TEXT NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (transaction_id) REFERENCES portfolio_transactions (id)
+    )
+    ''')
+    
+    c.execute('''
+    CREATE INDEX IF NOT EXISTS idx_portfolio_transactions_user_date
+    ON portfolio_transactions (user_id, trade_date)
+    ''')
+    
+    c.execute('''
+    CREATE INDEX IF NOT EXISTS idx_portfolio_lots_user_ticker
+    ON portfolio_lots (user_id, ticker, trade_date)
+    ''')
+    
+    # Carry existing positions over as opening buys
+    c.execute('''
+    INSERT INTO portfolio_transactions (user_id, ticker, side, shares, price, trade_date, created_at)
+    SELECT user_id, ticker, 'BUY', shares, purchase_price, purchase_date, created_at
+    FROM portfolio_items
+    ORDER BY id
+    ''')
+    
+    c.execute('''
+    INSERT INTO portfolio_lots (user_id, ticker, transaction_id, shares, remaining_shares, price, trade_date)
+    SELECT user_id, ticker, id, shares, shares, price, trade_date
+    FROM portfolio_transactions
+    ORDER BY id
+    ''')
+
+def _create_suggestion_rankings(c):
+    """Migration 6: daily precomputed stock suggestions per risk profile"""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS suggestion_rankings (
+        risk_profile TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        ticker TEXT NOT NULL,
+        name TEXT,
+        sector TEXT,
+        suitability_score REAL NOT NULL,
+        match_rating TEXT,
+        current_price REAL,
+        market_cap REAL,
+        beta REAL,
+        volatility REAL,
+        computed_on TEXT NOT NULL,
+        PRIMARY KEY (risk_profile, rank)
+    ) WITHOUT ROWID
+    ''')
+
+def _create_screener_metrics(c):
+    """Migration 7: latest indicators and risk metrics per universe ticker for the screener"""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS screener_metrics (
+        ticker TEXT PRIMARY KEY,
+        name TEXT,
+        sector TEXT,
+        price REAL,
+        change REAL,
+        volume REAL,
+        rsi REAL,
+        ma20 REAL,
+        ma50 REAL,
+        ma200 REAL,
+        macd REAL,
+        macd_signal REAL,
+        volatility REAL,
+        sharpe REAL,
+        sortino REAL,
+        max_drawdown REAL,
+        beta REAL,
+        alpha REAL,
+        computed_on TEXT NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+# Schema migrations in order; a database at PRAGMA user_version N has run the first N.
+# Append new steps to the end and never edit or reorder the ones already shipped.
+MIGRATIONS = [
+    _create_core_tables,
+    _create_user_indexes,
+    _create_price_tables,
+    _create_portfolio_snapshots,
+    _create_transaction_ledger,
+    _create_suggestion_rankings,
+    _create_screener_metrics,
+]
+
+def get_schema_version(conn):
+    """Return the number of migrations applied to the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations, each in its own write transaction.
+    
+    The version is re-read after taking the write lock, so several processes
+    starting at once apply each step exactly once. Returns the final version.
+    """
+    version = get_schema_version(conn)
+    if version >= len(MIGRATIONS):
+        return version
+    
+    c = conn.cursor()
+    while True:
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            version = get_schema_version(conn)
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                return version
+            
+            MIGRATIONS[version](c)
+            c.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def init_db(db_path=DB_PATH):
+    """Bring the database schema up to date; a no-op apart from one pragma read once it is current"""
+    conn = get_connection(db_path)
+    try:
+        migrate(conn)
+    except Exception as e:
+        print(f"Error migrating database: {str(e)}")
+        raise
+
+# Per-user and per-ticker queries issued by the pages and utils. The code runs
+# these constants, and audit_query_plans checks them (see database_test.py).
+RISK_SCORE_QUERY = "SELECT risk_score, risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1"
+RISK_PROFILE_QUERY = "SELECT risk_profile FROM risk_assessments WHERE user_id = ? ORDER BY created_at DESC LIMIT 1"
+RISK_DESCRIPTION_QUERY = (
+    "SELECT risk_score, risk_profile, risk_description FROM risk_assessments "
+    "WHERE user_id = ? ORDER BY created_at DESC LIMIT 1"
+)
+RISK_ASSESSMENT_QUERY = (
+    "SELECT risk_score, risk_profile, risk_description, created_at FROM risk_assessments "
+    "WHERE user_id = ? ORDER BY created_at DESC LIMIT 1"
+)
+CHAT_HISTORY_QUERY = "SELECT message, is_user, timestamp FROM chat_messages WHERE user_id = ? ORDER BY timestamp ASC LIMIT 20"
+HOLDINGS_QUERY = "SELECT id, ticker, shares, purchase_price, purchase_date FROM portfolio_items WHERE user_id = ?"
+PORTFOLIO_ITEMS_QUERY = "SELECT ticker, shares, purchase_price, purchase_date FROM portfolio_items WHERE user_id = ?"
+PORTFOLIO_POSITIONS_QUERY = "SELECT ticker, shares, purchase_price FROM portfolio_items WHERE user_id = ?"
+PORTFOLIO_ITEM_ID_QUERY = "SELECT id FROM portfolio_items WHERE user_id = ? AND ticker = ?"
+PORTFOLIO_COUNT_QUERY = "SELECT COUNT(*) FROM portfolio_items WHERE user_id = ?"
+WATCHLIST_QUERY = "SELECT id, ticker, added_at FROM watchlist_items WHERE user_id = ?"
+WATCHLIST_ITEM_ID_QUERY = "SELECT id FROM watchlist_items WHERE user_id = ? AND ticker = ?"
+SELECTED_STOCKS_QUERY = "SELECT ticker FROM selected_stocks WHERE user_id = ?"
+THEME_QUERY = "SELECT theme FROM user_settings WHERE user_id = ?"
+USER_SETTINGS_ID_QUERY = "SELECT id FROM user_settings WHERE user_id = ?"
+NOTIFICATION_SETTINGS_QUERY = "SELECT email_notifications, price_alerts FROM user_settings WHERE user_id = ?"
+LOGIN_QUERY = "SELECT id, username FROM users WHERE username = ? AND password = ?"
+USER_EXISTS_QUERY = "SELECT id FROM users WHERE username = ? OR email = ?"
+USER_PROFILE_QUERY = "SELECT username, email, full_name FROM users WHERE id = ?"
+USER_EMAIL_QUERY = "SELECT email FROM users WHERE id = ?"
+PASSWORD_CHECK_QUERY = "SELECT id FROM users WHERE id = ? AND password = ?"
+LAST_SNAPSHOT_QUERY = "SELECT date, last_transaction_id FROM portfolio_snapshots WHERE user_id = ? ORDER BY date DESC LIMIT 1"
+NAV_HISTORY_QUERY = "SELECT date, market_value, cost_basis FROM portfolio_snapshots WHERE user_id = ? ORDER BY date"
+OPEN_LOTS_QUERY = (
+    "SELECT id, remaining_shares, price FROM portfolio_lots "
+    "WHERE user_id = ? AND ticker = ? AND remaining_shares > 0 ORDER BY trade_date, id"
+)
+OPEN_POSITION_QUERY = (
+    "SELECT SUM(remaining_shares), SUM(remaining_shares * price), MIN(trade_date) FROM portfolio_lots "
+    "WHERE user_id = ? AND ticker = ? AND remaining_shares > 0"
+)
+TRANSACTIONS_QUERY = (
+    "SELECT id, ticker, side, shares, price, trade_date, realized_gain FROM portfolio_transactions "
+    "WHERE user_id = ? ORDER BY trade_date, id"
+)
+SNAPSHOT_USERS_QUERY = "SELECT DISTINCT user_id FROM portfolio_transactions"
+SUGGESTIONS_QUERY = (
+    "SELECT ticker, name, sector, suitability_score, match_rating, current_price, market_cap, beta, volatility, computed_on "
+    "FROM suggestion_rankings WHERE risk_profile = ? AND suitability_score >= ? "
+    "AND ticker NOT IN (SELECT ticker FROM portfolio_items WHERE user_id = ?) ORDER BY rank LIMIT ?"
+)
+SUGGESTIONS_READY_QUERY = "SELECT 1 FROM suggestion_rankings LIMIT 1"
+# {placeholders} is filled with one ? per ticker
+PRICE_COVERAGE_QUERY = "SELECT ticker, start_date, end_date FROM price_coverage WHERE ticker IN ({placeholders})"
+PRICE_HISTORY_QUERY = (
+    "SELECT ticker, date, open, high, low, close, volume FROM price_history "
+    "WHERE ticker IN ({placeholders}) AND date >= ? AND date < ? ORDER BY ticker, date"
+)
+DELETE_SNAPSHOTS_FROM_QUERY = "DELETE FROM portfolio_snapshots WHERE user_id = ? AND date >= ?"
+DELETE_SELECTED_STOCK_QUERY = "DELETE FROM selected_stocks WHERE user_id = ? AND ticker = ?"
+DELETE_PORTFOLIO_ITEM_QUERY = "DELETE FROM portfolio_items WHERE user_id = ? AND ticker = ?"
+# One ? for the user id; deletes every row of a user from the given table
+DELETE_USER_ROWS_QUERY = "DELETE FROM {table} WHERE user_id = ?"
+USER_TABLES = [
+    'portfolio_lots', 'portfolio_transactions', 'portfolio_items', 'portfolio_snapshots',
+    'watchlist_items', 'risk_assessments', 'selected_stocks', 'chat_messages',
+]
+
+HOT_QUERIES = [
+    (RISK_SCORE_QUERY, (1,)),
+    (RISK_PROFILE_QUERY, (1,)),
+    (RISK_DESCRIPTION_QUERY, (1,)),
+    (RISK_ASSESSMENT_QUERY, (1,)),
+    (CHAT_HISTORY_QUERY, (1,)),
+    (HOLDINGS_QUERY, (1,)),
+    (PORTFOLIO_ITEMS_QUERY, (1,)),
+    (PORTFOLIO_POSITIONS_QUERY, (1,)),
+    (PORTFOLIO_ITEM_ID_QUERY, (1, 'AAPL')),
+    (PORTFOLIO_COUNT_QUERY, (1,)),
+    (WATCHLIST_QUERY, (1,)),
+    (WATCHLIST_ITEM_ID_QUERY, (1, 'AAPL')),
+    (SELECTED_STOCKS_QUERY, (1,)),
+    (THEME_QUERY, (1,)),
+    (USER_SETTINGS_ID_QUERY, (1,)),
+    (NOTIFICATION_SETTINGS_QUERY, (1,)),
+    (LOGIN_QUERY, ('demo_user', '')),
+    (USER_EXISTS_QUERY, ('demo_user', 'demo@example.com')),
+    (USER_PROFILE_QUERY, (1,)),
+    (USER_EMAIL_QUERY, (1,)),
+    (PASSWORD_CHECK_QUERY, (1, '')),
+    (LAST_SNAPSHOT_QUERY, (1,)),
+    (NAV_HISTORY_QUERY, (1,)),
+    (OPEN_LOTS_QUERY, (1, 'AAPL')),
+    (OPEN_POSITION_QUERY, (1, 'AAPL')),
+    (TRANSACTIONS_QUERY, (1,)),
+    (SNAPSHOT_USERS_QUERY, ()),
+    (SUGGESTIONS_QUERY, ('Moderate', 70, 1, 5)),
+    (SUGGESTIONS_READY_QUERY, ()),
+    (PRICE_COVERAGE_QUERY.format(placeholders='?, ?'), ('AAPL', 'MSFT')),
+    (PRICE_HISTORY_QUERY.format(placeholders='?, ?'), ('AAPL', 'MSFT', '2025-01-01', '2026-01-01')),
+    (DELETE_SNAPSHOTS_FROM_QUERY, (1, '2026-01-01')),
+    (DELETE_SELECTED_STOCK_QUERY, (1, 'AAPL')),
+    (DELETE_PORTFOLIO_ITEM_QUERY, (1, 'AAPL')),
+] + [(DELETE_USER_ROWS_QUERY.format(table=table), (1,)) for table in USER_TABLES]
+
+# Hot queries that are meant to read a whole table (or index): the nightly
+# snapshot job lists every user, and the first suggestion row stops the scan
+FULL_SCAN_QUERIES = {SNAPSHOT_USERS_QUERY, SUGGESTIONS_READY_QUERY}
+
+def audit_query_plans(conn=None, queries=None):
+    """Run EXPLAIN QUERY PLAN on each hot query and return the ones that scan a whole table or index, or sort.
+    
+    Returns a list of (sql, plan detail) pairs; an empty list means every query
+    is served by index lookups. Queries in FULL_SCAN_QUERIES may scan.
+    """
+    conn = conn or get_connection()
+    c = conn.cursor()
+    problems = []
+    
+    for sql, params in queries or HOT_QUERIES:
+        c.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        for row in c.fetchall():
+            detail = row[-1]
+            full_scan = detail.startswith('SCAN') and sql not in FULL_SCAN_QUERIES
+            if full_scan or 'TEMP B-TREE' in detail:
+                problems.append((sql, detail))
     
-    conn.commit()
-    conn.close()
+    return problems
@@ -0,0 +1,261 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Column order matches the indicator columns added by calculate_technical_indicators
+INDICATOR_COLUMNS = [
+    'Daily_Return', 'MA20', 'MA50', 'MA200', 'STD20', 'Upper_Band', 'Lower_Band',
+    'RSI', 'EMA12', 'EMA26', 'MACD', 'Signal_Line', 'MACD_Histogram', 'Volume_MA50'
+]
+
+def calculate_indicator_panel(close, volume=None):
+    """Calculate technical indicators for many tickers in one vectorized pass.
+
+    close (and optionally volume) are wide DataFrames indexed by date with one
+    column per ticker. Returns a dict mapping each name in INDICATOR_COLUMNS to a
+    DataFrame of the same shape, keeping the original DatetimeIndex.
+    """
+    close = close.astype(float)
+    panel = {}
+
+    panel['Daily_Return'] = close.pct_change()
+
+    # Moving averages
+    panel['MA20'] = close.rolling(window=20).mean()
+    panel['MA50'] = close.rolling(window=50).mean()
+    panel['MA200'] = close.rolling(window=200).mean()
+
+    # Bollinger Bands
+    panel['STD20'] = close.rolling(window=20).std()
+    panel['Upper_Band'] = panel['MA20'] + (panel['STD20'] * 2)
+    panel['Lower_Band'] = panel['MA20'] - (panel['STD20'] * 2)
+
+    # RSI (simple 14-day average of gains and losses)
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
+    panel['RSI'] = 100 - (100 / (1 + gain / loss))
+
+    # MACD
+    panel['EMA12'] = close.ewm(span=12, adjust=False).mean()
+    panel['EMA26'] = close.ewm(span=26, adjust=False).mean()
+    panel['MACD'] = panel['EMA12'] - panel['EMA26']
+    panel['Signal_Line'] = panel['MACD'].ewm(span=9, adjust=False).mean()
+    panel['MACD_Histogram'] = panel['MACD'] - panel['Signal_Line']
+
+    # Volume moving average
+    if volume is not None:
+        panel['Volume_MA50'] = volume.astype(float).rolling(window=50).mean()
+
+    return panel
+
+def calculate_signal_panel(close, volume, panel):
+    """Derive the chatbot's MA, Bollinger Band and volume signals from an indicator panel"""
+    close = close.astype(float)
+    signals = {}
+
+    signals['MA_Signal'] = (panel['MA50'] > panel['MA200']).astype(int)
+
+    # -1 overbought (above upper band), 1 oversold (below lower band)
+    bb_signal = pd.DataFrame(0, index=close.index, columns=close.columns)
+    bb_signal[close > panel['Upper_Band']] = -1
+    bb_signal[close < panel['Lower_Band']] = 1
+    signals['BB_Signal'] = bb_signal
+
+    signals['Volume_Signal'] = (volume.astype(float) > panel['Volume_MA50']).astype(int)
+
+    return signals
+
+def build_price_panel(frames, column='Close'):
+    """Combine per-ticker frames ({ticker: DataFrame}) into a wide dates x tickers panel for one column"""
+    series = {}
+    for ticker, data in frames.items():
+        if data is None or data.empty:
+            continue
+        values = data[column]
+        if isinstance(values, pd.DataFrame):
+            values = values.squeeze(axis=1)
+        series[ticker] = values
+
+    return pd.DataFrame(series)
+
+class IndicatorState:
+    """Running indicator state for one ticker, updated in O(1) per new daily bar.
+
+    Holds the rolling window sums, EMA states and RSI averages behind
+    calculate_indicator_panel and calculate_signal_panel, so a refresh that adds
+    one bar doesn't recompute the whole history. Values produced by update()
+    match the batch functions for the same bars. Bars must not contain NaN.
+    """
+
+    MA_WINDOWS = (20, 50, 200)
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = None
+        self.closes = deque(maxlen=max(self.MA_WINDOWS))
+        self.volumes = deque(maxlen=50)
+        self.close_sums = {window: 0.0 for window in self.MA_WINDOWS}
+        self.volume_sum = 0.0
+
+        # Welford mean / sum of squared deviations over the 20-bar window
+        self.mean20 = 0.0
+        self.m2_20 = 0.0
+
+        self.gains = deque(maxlen=14)
+        self.losses = deque(maxlen=14)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+
+        self.ema12 = None
+        self.ema26 = None
+        self.signal = None
+
+        self.values = {}
+
+    @classmethod
+    def from_history(cls, close, volume):
+        """Seed the state from a full history of closes and volumes (1D, oldest first)"""
+        state = cls()
+        close = pd.Series(close, dtype=float).reset_index(drop=True)
+        volume = pd.Series(volume, dtype=float).reset_index(drop=True)
+
+        if close.empty:
+            return state
+
+        state.count = len(close)
+        state.prev_close = close.iloc[-1]
+
+        state.closes.extend(close.iloc[-state.closes.maxlen:])
+        state.volumes.extend(volume.iloc[-state.volumes.maxlen:])
+
+        recent = list(state.closes)
+        for window in cls.MA_WINDOWS:
+            state.close_sums[window] = float(np.sum(recent[-window:]))
+        state.volume_sum = float(np.sum(state.volumes))
+
+        window20 = np.array(recent[-20:])
+        state.mean20 = window20.mean()
+        state.m2_20 = float(((window20 - state.mean20) ** 2).sum())
+
+        # The first bar counts as a zero gain/loss, as in the batch RSI
+        delta = close.diff().fillna(0).iloc[-14:]
+        state.gains.extend(delta.clip(lower=0))
+        state.losses.extend((-delta).clip(lower=0))
+        state.gain_sum = float(np.sum(state.gains))
+        state.loss_sum = float(np.sum(state.losses))
+
+        ema12 = close.ewm(span=12, adjust=False).mean()
+        ema26 = close.ewm(span=26, adjust=False).mean()
+        state.ema12 = ema12.iloc[-1]
+        state.ema26 = ema26.iloc[-1]
+        state.signal = (ema12 - ema26).ewm(span=9, adjust=False).mean().iloc[-1]
+
+        state.values = state._current_values(close.iloc[-1], volume.iloc[-1], close.iloc[-2] if len(close) > 1 else None)
+        return state
+
+    def update(self, close, volume):
+        """Add one bar and return the indicator values for it"""
+        close = float(close)
+        volume = float(volume)
+        prev_close = self.prev_close
+
+        # Rolling close sums; the value leaving each window is read before appending
+        for window in self.MA_WINDOWS:
+            self.close_sums[window] += close
+            if self.count >= window:
+                self.close_sums[window] -= self.closes[-window]
+
+        if self.count >= 20:
+            self._remove_from_window20(self.closes[-20])
+        self._add_to_window20(close)
+
+        if len(self.volumes) == self.volumes.maxlen:
+            self.volume_sum -= self.volumes[0]
+        self.volume_sum += volume
+
+        delta = close - prev_close if prev_close is not None else 0.0
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        if len(self.gains) == self.gains.maxlen:
+            self.gain_sum -= self.gains[0]
+            self.loss_sum -= self.losses[0]
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.gain_sum += gain
+        self.loss_sum += loss
+
+        self.ema12 = self._ema(self.ema12, close, 12)
+        self.ema26 = self._ema(self.ema26, close, 26)
+        self.signal = self._ema(self.signal, self.ema12 - self.ema26, 9)
+
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.count += 1
+        self.prev_close = close
+
+        self.values = self._current_values(close, volume, prev_close)
+        return self.values
+
+    def _add_to_window20(self, value):
+        n = min(self.count, 19) + 1
+        delta = value - self.mean20
+        self.mean20 += delta / n
+        self.m2_20 += delta * (value - self.mean20)
+
+    def _remove_from_window20(self, value):
+        n = 19
+        delta = value - self.mean20
+        self.mean20 -= delta / n
+        self.m2_20 -= delta * (value - self.mean20)
+
+    @staticmethod
+    def _ema(previous, value, span):
+        if previous is None:
+            return value
+        alpha = 2 / (span + 1)
+        return previous + alpha * (value - previous)
+
+    def _current_values(self, close, volume, prev_close):
+        nan = float('nan')
+        values = {}
+
+        values['Daily_Return'] = close / prev_close - 1 if prev_close else nan
+
+        for window in self.MA_WINDOWS:
+            values[f'MA{window}'] = self.close_sums[window] / window if self.count >= window else nan
+
+        values['STD20'] = math.sqrt(max(self.m2_20, 0.0) / 19) if self.count >= 20 else nan
+        values['Upper_Band'] = values['MA20'] + (values['STD20'] * 2)
+        values['Lower_Band'] = values['MA20'] - (values['STD20'] * 2)
+
+        if self.count >= 14:
+            avg_gain = self.gain_sum / 14
+            avg_loss = self.loss_sum / 14
+            if avg_loss > 0:
+                values['RSI'] = 100 - (100 / (1 + avg_gain / avg_loss))
+            else:
+                values['RSI'] = 100.0 if avg_gain > 0 else nan
+        else:
+            values['RSI'] = nan
+
+        values['EMA12'] = self.ema12
+        values['EMA26'] = self.ema26
+        values['MACD'] = self.ema12 - self.ema26
+        values['Signal_Line'] = self.signal
+        values['MACD_Histogram'] = values['MACD'] - self.signal
+
+        values['Volume_MA50'] = self.volume_sum / 50 if self.count >= 50 else nan
+
+        values['MA_Signal'] = int(values['MA50'] > values['MA200'])
+        if close > values['Upper_Band']:
+            values['BB_Signal'] = -1
+        elif close < values['Lower_Band']:
+            values['BB_Signal'] = 1
+        else:
+            values['BB_Signal'] = 0
+        values['Volume_Signal'] = int(volume > values['Volume_MA50'])
+
+        return values
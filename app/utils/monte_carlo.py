@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+CONFIDENCE_LEVELS = (0.95, 0.99)
+
+# Default cap on simulation threads; peak memory grows with chunk_size x workers
+MAX_WORKERS = 4
+
+def _covariance_factor(covariance):
+    """Matrix L with L @ L.T == covariance; falls back to an eigen factor when not positive definite"""
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+def _max_drawdowns(values):
+    """Largest peak-to-trough fall of each path (rows of values, starting value 1)"""
+    running_max = np.maximum.accumulate(np.maximum(values, 1.0), axis=1)
+    return (1 - values / running_max).max(axis=1)
+
+def simulate_portfolio_paths(mean, covariance, weights, size, horizon, rng, rebalance=False, dtype=np.float32):
+    """Simulate size portfolio value paths (size x horizon, starting value 1).
+
+    Daily asset returns are drawn from a multivariate normal with the given mean
+    and covariance. Without rebalancing each asset compounds on its own from its
+    initial weight (buy and hold); with rebalancing the weights are restored every
+    day, so only the portfolio's own return needs to be drawn. Paths come in
+    antithetic pairs (shocks z and -z), which halves the random draws and
+    reduces the variance of the estimates.
+    """
+    half = (size + 1) // 2
+    mean = np.asarray(mean, dtype=dtype)
+    weights = np.asarray(weights, dtype=dtype)
+    covariance = np.asarray(covariance, dtype=float)
+
+    if rebalance:
+        portfolio_std = np.sqrt(max(weights @ covariance @ weights, 0.0))
+        shocks = rng.standard_normal((half, horizon), dtype=dtype)
+        returns = np.concatenate([shocks, -shocks])[:size]
+        returns *= dtype(portfolio_std)
+        returns += 1 + weights @ mean
+        return np.cumprod(returns, axis=1, out=returns)
+
+    factor = _covariance_factor(covariance).astype(dtype)
+    shocks = (rng.standard_normal((half * horizon, mean.size), dtype=dtype) @ factor.T).reshape(half, horizon, mean.size)
+    returns = np.concatenate([shocks, -shocks])[:size]
+    del shocks
+    returns += 1 + mean
+    np.cumprod(returns, axis=1, out=returns)
+    return returns @ weights
+
+def _simulate_chunk(args):
+    """Terminal return and max drawdown of each path in one chunk"""
+    mean, covariance, weights, size, horizon, rng, rebalance = args
+    values = simulate_portfolio_paths(mean, covariance, weights, size, horizon, rng, rebalance)
+    return values[:, -1].astype(float) - 1, _max_drawdowns(values).astype(float)
+
+def monte_carlo_risk(returns, weights, n_paths=100000, horizon=TRADING_DAYS, confidence_levels=CONFIDENCE_LEVELS,
+                     seed=None, chunk_size=2000, rebalance=False, workers=None):
+    """Simulated VaR, CVaR and drawdown distribution for a portfolio over horizon days.
+
+    returns is a DataFrame of daily returns (dates x tickers) for the holdings and
+    weights their portfolio weights (Series by ticker or array in column order,
+    normalized to sum to 1). seed may be an int or a numpy Generator; every chunk
+    of chunk_size paths gets its own child generator, so results for a seed don't
+    depend on the number of worker threads. Each worker holds about
+    chunk_size * horizon * assets float32 values (roughly 150 MB at 2000 x 252 x
+    30) plus temporaries, so peak memory is about that times workers. workers
+    defaults to min(MAX_WORKERS, CPU count). Losses are fractions of the starting
+    value, positive for a loss.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    if isinstance(weights, pd.Series):
+        weights = weights.reindex(returns.columns).fillna(0).to_numpy(dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+
+    # Moments over the dates every holding traded
+    history = returns.dropna().to_numpy(dtype=float)
+    if len(history) < 2:
+        raise ValueError("Not enough overlapping return history to estimate the covariance")
+    mean = history.mean(axis=0)
+    covariance = np.atleast_2d(np.cov(history, rowvar=False))
+
+    sizes = [min(chunk_size, n_paths - first) for first in range(0, n_paths, chunk_size)]
+    chunks = [
+        (mean, covariance, weights, size, horizon, chunk_rng, rebalance)
+        for size, chunk_rng in zip(sizes, rng.spawn(len(sizes)))
+    ]
+
+    # NumPy's generators and BLAS release the GIL, so chunks run in parallel on threads
+    workers = workers or min(MAX_WORKERS, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_simulate_chunk, chunks))
+
+    terminal_returns = np.concatenate([result[0] for result in results])
+    max_drawdowns = np.concatenate([result[1] for result in results])
+
+    losses = -terminal_returns
+    var = {}
+    cvar = {}
+    for level in confidence_levels:
+        var[level] = np.quantile(losses, level)
+        cvar[level] = losses[losses >= var[level]].mean()
+
+    return {
+        'VaR': var,
+        'CVaR': cvar,
+        'expected_return': terminal_returns.mean(),
+        'terminal_returns': terminal_returns,
+        'max_drawdowns': max_drawdowns,
+        'drawdown_percentiles': dict(zip((50, 95, 99), np.percentile(max_drawdowns, [50, 95, 99]))),
+    }
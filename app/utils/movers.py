@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+
+from utils.cache import TTLCache
+from utils.quotes import QuoteRefresher
+from utils.screener import UNIVERSE_PATH, load_universe
+
+# Seconds between background refreshes of the universe quotes
+MOVERS_REFRESH_INTERVAL = 120
+
+MOVERS_CACHE = TTLCache(maxsize=16, ttl=MOVERS_REFRESH_INTERVAL)
+
+_universe_refreshers = {}
+_universe_refreshers_lock = threading.Lock()
+
+def _top_k(values, k):
+    """Indices of the k largest values, largest first"""
+    if k < values.size:
+        top = np.argpartition(values, -k)[-k:]
+    else:
+        top = np.arange(values.size)
+    return top[np.argsort(values[top])[::-1]]
+
+def rank_movers(quotes, k=3):
+    """Top k gainers and losers from a quote snapshot (DataFrame with Price and Previous Close by ticker).
+
+    Returns two lists of dicts with Ticker, Price and Change % (in percent).
+    Tickers without both prices are skipped, gainers only include rising stocks
+    and losers only falling ones.
+    """
+    prices = quotes['Price'].to_numpy(dtype=float)
+    previous = quotes['Previous Close'].to_numpy(dtype=float)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = np.where(previous > 0, (prices / previous - 1) * 100, np.nan)
+
+    valid = np.flatnonzero(np.isfinite(change))
+    tickers = quotes.index.to_numpy()[valid]
+    prices = prices[valid]
+    change = change[valid]
+
+    def movers(order, keep):
+        return [
+            {'Ticker': tickers[i], 'Price': prices[i], 'Change %': change[i]}
+            for i in order if keep(change[i])
+        ]
+
+    gainers = movers(_top_k(change, k), lambda value: value > 0)
+    losers = movers(_top_k(-change, k), lambda value: value < 0)
+    return gainers, losers
+
+def get_universe_refresher(universe_path=UNIVERSE_PATH):
+    """Return the process-wide background quote refresher for a universe CSV, started on first use"""
+    with _universe_refreshers_lock:
+        refresher = _universe_refreshers.get(universe_path)
+        if refresher is None:
+            tickers = load_universe(universe_path).index.tolist()
+            refresher = _universe_refreshers[universe_path] = QuoteRefresher(tickers, MOVERS_REFRESH_INTERVAL)
+    refresher.start()
+    return refresher
+
+def get_top_movers(k=3, universe_path=UNIVERSE_PATH, refresher=None):
+    """Top k gainers and losers of the universe, never waiting on the network.
+
+    Quotes come from a background refresher's in-memory snapshot, and the ranking
+    for each snapshot is shared by all sessions. Returns empty lists until the
+    first snapshot has been downloaded; empty results are not cached.
+    """
+    refresher = refresher or get_universe_refresher(universe_path)
+    quotes = refresher.get_quotes()
+    if quotes.empty:
+        return [], []
+
+    key = (universe_path, k, refresher.updated_at)
+    movers = MOVERS_CACHE.get(key)
+    if movers is None:
+        movers = rank_movers(quotes, k)
+        if movers[0] or movers[1]:
+            MOVERS_CACHE.set(key, movers)
+    return movers
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from utils.database import get_connection
+from utils.indicators import build_price_panel
+from utils.portfolio import load_transactions
+from utils.price_store import get_price_store
+
+TRADING_DAYS = 252
+DAYS_PER_YEAR = 365.0
+
+def _npv_and_derivative(rate, amounts, times):
+    """NPV of the cash flows at rate and its derivative with respect to rate"""
+    discount = (1.0 + rate) ** -times
+    npv = np.dot(amounts, discount)
+    derivative = np.dot(-times * amounts, discount / (1.0 + rate))
+    return npv, derivative
+
+def _solve_rate(amounts, times, guess=0.1, tol=1e-10, max_iter=50):
+    """Root of NPV(rate) = 0: Newton steps, falling back to bisection on a bracket"""
+    amounts = np.asarray(amounts, dtype=float)
+    times = np.asarray(times, dtype=float)
+
+    # A rate of return only exists if money goes both in and out
+    if amounts.size < 2 or not ((amounts > 0).any() and (amounts < 0).any()):
+        return np.nan
+
+    rate = guess
+    for _ in range(max_iter):
+        npv, derivative = _npv_and_derivative(rate, amounts, times)
+        if derivative == 0 or not np.isfinite(derivative):
+            break
+        step = npv / derivative
+        new_rate = rate - step
+        if new_rate <= -1 or not np.isfinite(new_rate):
+            break
+        if abs(step) < tol:
+            return new_rate
+        rate = new_rate
+
+    # Newton diverged; bisect over a bracket with a sign change
+    rates = np.concatenate([np.linspace(-0.99, 1, 200), np.geomspace(1.01, 1e4, 100)])
+    npvs = ((1.0 + rates[:, None]) ** -times[None, :]) @ amounts
+    sign_change = np.nonzero(np.sign(npvs[:-1]) != np.sign(npvs[1:]))[0]
+    if sign_change.size == 0:
+        return np.nan
+
+    low, high = rates[sign_change[0]], rates[sign_change[0] + 1]
+    npv_low = npvs[sign_change[0]]
+    for _ in range(200):
+        mid = (low + high) / 2
+        npv_mid = _npv_and_derivative(mid, amounts, times)[0]
+        if abs(npv_mid) < tol or high - low < tol:
+            return mid
+        if np.sign(npv_mid) == np.sign(npv_low):
+            low, npv_low = mid, npv_mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+def irr(amounts, guess=0.1):
+    """Internal rate of return per period for evenly spaced cash flows (investments negative)"""
+    amounts = np.asarray(amounts, dtype=float)
+    return _solve_rate(amounts, np.arange(amounts.size, dtype=float), guess)
+
+def xirr(amounts, dates, guess=0.1):
+    """Annualized money-weighted return for cash flows on arbitrary dates (investments negative)"""
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+    times = (dates - dates.min()).astype(float) / DAYS_PER_YEAR
+    return _solve_rate(amounts, times, guess)
+
+def time_weighted_return(values, flows):
+    """Chain-linked time-weighted return.
+
+    values[t] is the portfolio value at the end of day t, after that day's
+    external cash flow flows[t] (contributions positive, withdrawals negative).
+    Returns the total TWR and the array of daily sub-period returns.
+    """
+    values = np.asarray(values, dtype=float)
+    flows = np.asarray(flows, dtype=float)
+
+    previous = values[:-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily = np.where(previous > 0, (values[1:] - flows[1:]) / previous - 1, 0.0)
+
+    return np.prod(1 + daily) - 1, daily
+
+def holding_contributions(prices, shares, values):
+    """Each holding's contribution to the compounded portfolio return.
+
+    prices and shares are dates x holdings arrays (shares held at each close) and
+    values the matching portfolio values. A holding's daily contribution is its
+    start-of-day weight times its price return, scaled by the portfolio's growth
+    up to that day so the contributions add up to the compounded return.
+    """
+    prices = np.asarray(prices, dtype=float)
+    shares = np.asarray(shares, dtype=float)
+    values = np.asarray(values, dtype=float)
+
+    previous_value = values[:-1, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weights = np.where(previous_value > 0, shares[:-1] * prices[:-1] / previous_value, 0.0)
+        price_returns = np.nan_to_num(prices[1:] / prices[:-1] - 1)
+
+    daily = weights * price_returns
+    growth = np.concatenate([[1.0], np.cumprod(1 + daily.sum(axis=1))[:-1]])
+    return (daily * growth[:, None]).sum(axis=0)
+
+def portfolio_performance(user_id, start_date=None, end_date=None, price_store=None, conn=None):
+    """TWR, XIRR and per-holding contribution for a user's ledger over [start_date, end_date].
+
+    Holdings are replayed from the transaction ledger against daily closes from
+    the price store, through the last completed session. The value held before
+    start_date counts as the opening investment. Returns a dict, or None when there is nothing to measure.
+    """
+    conn = conn or get_connection()
+    price_store = price_store or get_price_store()
+
+    transactions = load_transactions(user_id, conn)
+    if transactions.empty:
+        return None
+
+    trade_dates = pd.to_datetime(transactions['Trade Date'])
+    end = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp.now().normalize()
+    start = max(pd.Timestamp(start_date), trade_dates.min()) if start_date is not None else trade_dates.min()
+
+    # Completed sessions only; today's bar is still forming and would be re-downloaded on every render
+    price_end = min(end + pd.Timedelta(days=1), pd.Timestamp.now().normalize())
+
+    tickers = sorted(transactions['Ticker'].str.upper().unique())
+    frames = price_store.get_prices_batch(tickers, trade_dates.min(), price_end)
+    closes = build_price_panel(frames, 'Close').reindex(columns=tickers).sort_index().ffill()
+    if closes.empty:
+        return None
+
+    # Trades on non-trading days are booked on the next session
+    dates = closes.index
+    session = dates.searchsorted(trade_dates.to_numpy())
+    booked = session < len(dates)
+
+    signed = np.where(transactions['Side'] == 'SELL', -1.0, 1.0) * transactions['Shares'].to_numpy(dtype=float)
+    column = pd.Index(tickers).get_indexer(transactions['Ticker'].str.upper())
+
+    share_changes = np.zeros((len(dates), len(tickers)))
+    np.add.at(share_changes, (session[booked], column[booked]), signed[booked])
+    shares = np.cumsum(share_changes, axis=0)
+
+    flows = np.zeros(len(dates))
+    np.add.at(flows, session[booked], (signed * transactions['Price'].to_numpy(dtype=float))[booked])
+
+    prices = closes.to_numpy(dtype=float)
+    values = np.nansum(shares * prices, axis=1)
+
+    # Restrict to the window, with the day before it as the opening position
+    in_window = (dates >= start) & (dates <= end)
+    if not in_window.any():
+        return None
+    first = max(np.argmax(in_window) - 1, 0)
+    last = len(dates) - 1 - np.argmax(in_window[::-1])
+    window = slice(first, last + 1)
+
+    window_values = values[window]
+    window_flows = flows[window].copy()
+    window_dates = dates[window]
+
+    if first == np.argmax(in_window):
+        # The window starts with the first trade, so there's no opening balance
+        opening = 0.0
+    else:
+        opening = window_values[0]
+        window_flows[0] = 0.0
+
+    twr, _ = time_weighted_return(window_values, window_flows)
+    days = (window_dates[-1] - window_dates[0]).days
+    annualized_twr = (1 + twr) ** (DAYS_PER_YEAR / days) - 1 if days > 0 else np.nan
+
+    # Money-weighted: investor pays in flows (and the opening value), receives the final value
+    cash_flows = -window_flows
+    cash_flows[0] -= opening
+    cash_flows[-1] += window_values[-1]
+    money_weighted = xirr(cash_flows, window_dates)
+
+    contributions = pd.Series(
+        holding_contributions(prices[window], shares[window], window_values), index=tickers
+    )
+
+    return {
+        'start': window_dates[0],
+        'end': window_dates[-1],
+        'twr': twr,
+        'annualized_twr': annualized_twr,
+        'xirr': money_weighted,
+        'contributions': contributions,
+        'values': pd.Series(window_values, index=window_dates),
+    }
@@ -0,0 +1,304 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.database import (
+    get_connection, HOLDINGS_QUERY, OPEN_LOTS_QUERY, OPEN_POSITION_QUERY, DELETE_PORTFOLIO_ITEM_QUERY,
+    TRANSACTIONS_QUERY, DELETE_USER_ROWS_QUERY, LAST_SNAPSHOT_QUERY, DELETE_SNAPSHOTS_FROM_QUERY,
+    SNAPSHOT_USERS_QUERY, NAV_HISTORY_QUERY
+)
+from utils.indicators import build_price_panel
+from utils.price_store import get_price_store
+
+HOLDING_COLUMNS = ['ID', 'Ticker', 'Shares', 'Purchase Price', 'Purchase Date']
+TRANSACTION_COLUMNS = ['ID', 'Ticker', 'Side', 'Shares', 'Price', 'Trade Date', 'Realized Gain']
+
+# Share counts below this are treated as zero (float residue from partial sells)
+SHARE_EPSILON = 1e-9
+
+def load_portfolio(user_id, conn=None):
+    """Load a user's holdings as a typed DataFrame (one row per position)"""
+    conn = conn or get_connection()
+    holdings = pd.read_sql_query(HOLDINGS_QUERY, conn, params=(user_id,))
+
+    holdings.columns = HOLDING_COLUMNS
+    return holdings.astype({
+        'ID': 'int64',
+        'Ticker': 'string',
+        'Shares': 'float64',
+        'Purchase Price': 'float64',
+    })
+
+def record_transaction(user_id, ticker, side, shares, price, trade_date, conn=None):
+    """Append a buy or sell to the ledger and update the lots and position it affects.
+
+    A buy opens a new lot; a sell closes the oldest open lots first (FIFO) and
+    records the realized gain. Only the affected ticker's position row in
+    portfolio_items is recomputed. Returns the transaction id; raises ValueError
+    when selling more shares than are held.
+    """
+    conn = conn or get_connection()
+    c = conn.cursor()
+    ticker = ticker.upper()
+    side = side.upper()
+    shares = float(shares)
+    price = float(price)
+    trade_date = pd.Timestamp(trade_date).strftime('%Y-%m-%d')
+
+    if side not in ('BUY', 'SELL'):
+        raise ValueError(f"Unknown transaction side: {side}")
+    if shares <= 0:
+        raise ValueError("Transaction shares must be positive")
+
+    try:
+        c.execute("""
+        INSERT INTO portfolio_transactions (user_id, ticker, side, shares, price, trade_date, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+        """, (user_id, ticker, side, shares, price, trade_date))
+        transaction_id = c.lastrowid
+
+        if side == 'BUY':
+            c.execute("""
+            INSERT INTO portfolio_lots (user_id, ticker, transaction_id, shares, remaining_shares, price, trade_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (user_id, ticker, transaction_id, shares, shares, price, trade_date))
+        else:
+            realized_gain = _close_lots(c, user_id, ticker, shares, price)
+            c.execute("UPDATE portfolio_transactions SET realized_gain = ? WHERE id = ?", (realized_gain, transaction_id))
+
+        _refresh_position(c, user_id, ticker)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return transaction_id
+
+def _close_lots(c, user_id, ticker, shares, price):
+    """Consume open lots oldest first and return the realized gain"""
+    c.execute(OPEN_LOTS_QUERY, (user_id, ticker))
+
+    to_sell = shares
+    realized_gain = 0.0
+    updates = []
+
+    for lot_id, remaining, lot_price in c.fetchall():
+        if to_sell <= SHARE_EPSILON:
+            break
+        sold = min(remaining, to_sell)
+        realized_gain += sold * (price - lot_price)
+        updates.append((remaining - sold if remaining - sold > SHARE_EPSILON else 0.0, lot_id))
+        to_sell -= sold
+
+    if to_sell > SHARE_EPSILON:
+        raise ValueError(f"Cannot sell {shares:g} shares of {ticker}: only {shares - to_sell:g} held")
+
+    c.executemany("UPDATE portfolio_lots SET remaining_shares = ? WHERE id = ?", updates)
+    return realized_gain
+
+def _refresh_position(c, user_id, ticker):
+    """Recompute one position in portfolio_items from its open lots"""
+    c.execute(OPEN_POSITION_QUERY, (user_id, ticker))
+    shares, cost, first_date = c.fetchone()
+
+    if not shares or shares <= SHARE_EPSILON:
+        c.execute(DELETE_PORTFOLIO_ITEM_QUERY, (user_id, ticker))
+        return
+
+    c.execute("""
+    INSERT INTO portfolio_items (user_id, ticker, shares, purchase_price, purchase_date, created_at)
+    VALUES (?, ?, ?, ?, ?, datetime('now'))
+    ON CONFLICT (user_id, ticker) DO UPDATE SET
+        shares = excluded.shares,
+        purchase_price = excluded.purchase_price,
+        purchase_date = excluded.purchase_date,
+        updated_at = datetime('now')
+    """, (user_id, ticker, shares, cost / shares, first_date))
+
+def load_transactions(user_id, conn=None):
+    """Load a user's ledger, oldest first"""
+    conn = conn or get_connection()
+    transactions = pd.read_sql_query(TRANSACTIONS_QUERY, conn, params=(user_id,))
+
+    transactions.columns = TRANSACTION_COLUMNS
+    return transactions
+
+def clear_portfolio(user_id, conn=None):
+    """Delete a user's ledger, lots, positions and snapshots"""
+    conn = conn or get_connection()
+    c = conn.cursor()
+    for table in ('portfolio_lots', 'portfolio_transactions', 'portfolio_items', 'portfolio_snapshots'):
+        c.execute(DELETE_USER_ROWS_QUERY.format(table=table), (user_id,))
+    conn.commit()
+
+def value_portfolio(holdings, prices):
+    """Value every position against a price vector in one pass.
+
+    prices is a Series of current prices indexed by upper-case ticker. Returns the
+    priced positions (rows without a price are dropped) with Current Price, Cost
+    Basis, Current Value, Gain/Loss, Gain/Loss % and Allocation columns, and a
+    dict of portfolio totals.
+    """
+    valued = holdings.copy()
+    valued['Current Price'] = prices.reindex(valued['Ticker'].str.upper()).to_numpy(dtype=float)
+    valued = valued[~np.isnan(valued['Current Price'].to_numpy())].reset_index(drop=True)
+
+    shares = valued['Shares'].to_numpy(dtype=float)
+    cost_basis = shares * valued['Purchase Price'].to_numpy(dtype=float)
+    current_value = shares * valued['Current Price'].to_numpy(dtype=float)
+    gain_loss = current_value - cost_basis
+
+    total_value = current_value.sum()
+    total_cost = cost_basis.sum()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        valued['Cost Basis'] = cost_basis
+        valued['Current Value'] = current_value
+        valued['Gain/Loss'] = gain_loss
+        valued['Gain/Loss %'] = gain_loss / cost_basis * 100
+        valued['Allocation'] = current_value / total_value * 100 if total_value > 0 else 0.0
+
+    total_gain_loss = total_value - total_cost
+    totals = {
+        'value': total_value,
+        'cost': total_cost,
+        'gain_loss': total_gain_loss,
+        'gain_loss_pct': (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0,
+    }
+
+    return valued, totals
+
+def value_history(transactions, closes, dates):
+    """Market value and cost basis of the ledger's positions on each date.
+
+    transactions is the ledger as returned by load_transactions and closes a
+    dates x tickers panel of closing prices (forward-filled), indexed by
+    upper-case ticker. Shares held on each date are replayed from the trades;
+    trades before the first date count from it and trades on non-trading days
+    from the next session. A sell removes the FIFO cost of the lots it closed.
+    Returns a DataFrame indexed by date with Market Value and Cost Basis; dates
+    with nothing held or where a held position has no price yet are left out.
+    """
+    tickers = sorted(transactions['Ticker'].str.upper().unique())
+    prices = closes.reindex(index=dates, columns=tickers).to_numpy(dtype=float)
+
+    session = dates.searchsorted(pd.to_datetime(transactions['Trade Date']).to_numpy())
+    booked = session < len(dates)
+    column = pd.Index(tickers).get_indexer(transactions['Ticker'].str.upper())
+
+    shares = transactions['Shares'].to_numpy(dtype=float)
+    amount = shares * transactions['Price'].to_numpy(dtype=float)
+    is_sell = (transactions['Side'] == 'SELL').to_numpy()
+    realized = transactions['Realized Gain'].fillna(0).to_numpy(dtype=float)
+
+    share_changes = np.zeros((len(dates), len(tickers)))
+    np.add.at(share_changes, (session[booked], column[booked]), np.where(is_sell, -shares, shares)[booked])
+    held_shares = np.cumsum(share_changes, axis=0)
+    held_shares[np.abs(held_shares) <= SHARE_EPSILON] = 0.0
+
+    cost_changes = np.zeros(len(dates))
+    np.add.at(cost_changes, session[booked], np.where(is_sell, realized - amount, amount)[booked])
+    cost_basis = np.cumsum(cost_changes)
+
+    held = held_shares > 0
+    market_value = np.where(held, prices * held_shares, 0.0).sum(axis=1)
+    complete = held.any(axis=1) & ~(held & np.isnan(prices)).any(axis=1)
+
+    return pd.DataFrame({
+        'Market Value': market_value[complete],
+        'Cost Basis': cost_basis[complete],
+    }, index=dates[complete])
+
+def update_portfolio_snapshots(user_id, price_store=None, conn=None):
+    """Append a snapshot row for every completed trading day since the last one.
+
+    Snapshots are append-only: each row records the id of the newest ledger
+    transaction it reflects (last_transaction_id), and a trade entered since
+    then that is dated on or before the last snapshot rewrites the rows from its
+    trade date onwards. Prices are downloaded before any write, so the write
+    lock is only held for the final delete and insert. Returns the number of
+    rows written.
+    """
+    conn = conn or get_connection()
+    price_store = price_store or get_price_store()
+    c = conn.cursor()
+
+    transactions = load_transactions(user_id, conn)
+    if transactions.empty:
+        c.execute(DELETE_USER_ROWS_QUERY.format(table='portfolio_snapshots'), (user_id,))
+        conn.commit()
+        return 0
+
+    trade_dates = pd.to_datetime(transactions['Trade Date'])
+    last_id = int(transactions['ID'].max())
+
+    c.execute(LAST_SNAPSHOT_QUERY, (user_id,))
+    last = c.fetchone()
+
+    if last:
+        start = pd.Timestamp(last[0]) + timedelta(days=1)
+        entered_since = (transactions['ID'] > last[1]).to_numpy()
+        if entered_since.any():
+            start = min(start, trade_dates[entered_since].min())
+    else:
+        start = trade_dates.min()
+
+    # Only completed sessions are snapshotted; today's bar is still forming
+    end = pd.Timestamp(datetime.now().date())
+    if start >= end:
+        return 0
+
+    # Read a little before start so the first day can carry forward the last close
+    tickers = sorted(transactions['Ticker'].str.upper().unique())
+    frames = price_store.get_prices_batch(tickers, start - timedelta(days=10), end)
+    closes = build_price_panel(frames, 'Close').sort_index().ffill()
+    if closes.empty:
+        return 0
+
+    dates = closes.index[closes.index >= start]
+    history = value_history(transactions, closes, dates)
+
+    rows = [
+        (user_id, date.strftime('%Y-%m-%d'), float(value), float(cost), last_id)
+        for date, value, cost in zip(history.index, history['Market Value'], history['Cost Basis'])
+    ]
+    if not rows:
+        return 0
+
+    # Rewrite from start in one short transaction
+    try:
+        c.execute(DELETE_SNAPSHOTS_FROM_QUERY, (user_id, start.strftime('%Y-%m-%d')))
+        c.executemany("""
+        INSERT INTO portfolio_snapshots (user_id, date, market_value, cost_basis, last_transaction_id, created_at)
+        VALUES (?, ?, ?, ?, ?, datetime('now'))
+        """, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return len(rows)
+
+def update_all_portfolio_snapshots(price_store=None, conn=None):
+    """Run update_portfolio_snapshots for every user with a ledger; returns rows written per user"""
+    conn = conn or get_connection()
+    c = conn.cursor()
+    c.execute(SNAPSHOT_USERS_QUERY)
+
+    written = {}
+    for (user_id,) in c.fetchall():
+        try:
+            written[user_id] = update_portfolio_snapshots(user_id, price_store, conn)
+        except Exception as e:
+            print(f"Error updating portfolio snapshots for user {user_id}: {str(e)}")
+    return written
+
+def get_portfolio_nav(user_id, conn=None):
+    """Return the stored daily Market Value / Cost Basis series for a user"""
+    conn = conn or get_connection()
+    nav = pd.read_sql_query(NAV_HISTORY_QUERY, conn, params=(user_id,))
+
+    nav.columns = ['Date', 'Market Value', 'Cost Basis']
+    nav['Date'] = pd.to_datetime(nav['Date'])
+    return nav.set_index('Date')
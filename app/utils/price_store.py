@@ -0,0 +1,239 @@
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utils.database import DB_PATH, get_connection, init_db, PRICE_COVERAGE_QUERY, PRICE_HISTORY_QUERY
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Seconds before today's still-forming bar is downloaded again
+LIVE_BAR_TTL = 300
+
+
+def _to_date_str(value):
+    """Normalize a date, datetime or string to a YYYY-MM-DD string"""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+class PriceStore:
+    """Local store of daily OHLCV bars backed by SQLite.
+
+    Bars are kept in a ``price_history`` table keyed by (ticker, date) and the
+    contiguous date range already downloaded for each ticker is tracked in
+    ``price_coverage``. Any request overlapping that range is served locally and
+    only the missing head or tail is fetched from Yahoo Finance. Coverage never
+    includes today, whose bar is still forming; it is re-downloaded at most
+    every LIVE_BAR_TTL seconds per ticker.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._live_fetched = {}
+        self._ensure_schema()
+
+    def _connect(self):
+        return get_connection(self.db_path)
+
+    def _ensure_schema(self):
+        """Make sure the price tables exist (they are created by the schema migrations)"""
+        init_db(self.db_path)
+
+    def _ticker_lock(self, ticker):
+        """Per-ticker lock so concurrent sessions don't download the same range twice"""
+        with self._locks_guard:
+            if ticker not in self._locks:
+                self._locks[ticker] = threading.Lock()
+            return self._locks[ticker]
+
+    def get_prices(self, ticker, start_date, end_date):
+        """Return daily bars for ticker in [start_date, end_date) with Open/High/Low/Close/Volume columns"""
+        return self.get_prices_batch([ticker], start_date, end_date)[ticker.upper()]
+
+    def get_prices_batch(self, tickers, start_date, end_date):
+        """Return a dict of ticker -> daily bars, downloading every missing range in grouped requests"""
+        tickers = sorted(set(ticker.upper() for ticker in tickers))
+        today = datetime.now().strftime('%Y-%m-%d')
+        start = _to_date_str(start_date)
+        # Nothing exists after today, so later ends would only re-request today's bar
+        end = min(_to_date_str(end_date), _to_date_str(datetime.now() + timedelta(days=1)))
+
+        if start >= end:
+            return {ticker: pd.DataFrame(columns=PRICE_COLUMNS) for ticker in tickers}
+
+        # Locks are taken in sorted order so overlapping batches can't deadlock
+        with ExitStack() as stack:
+            for ticker in tickers:
+                stack.enter_context(self._ticker_lock(ticker))
+
+            coverages = self._get_coverages(tickers)
+
+            # Tickers missing the same range share one download
+            pending = {}
+            for ticker in tickers:
+                for missing in self._missing_ranges(coverages.get(ticker), start, end):
+                    if missing[0] >= today and not self._live_bar_stale(ticker, missing):
+                        continue
+                    pending.setdefault(missing, []).append(ticker)
+
+            for (range_start, range_end), group in pending.items():
+                try:
+                    frames = self._download(group, range_start, range_end)
+                except Exception as e:
+                    print(f"Error downloading prices for {', '.join(group)}: {str(e)}")
+                    continue
+
+                fetched_at = time.monotonic()
+                for ticker in group:
+                    coverages[ticker] = self._store_range(
+                        ticker, frames[ticker], range_start, range_end, coverages.get(ticker)
+                    )
+                    if range_end > today:
+                        self._live_fetched[ticker] = fetched_at
+
+        return self._read(tickers, start, end)
+
+    def _live_bar_stale(self, ticker, missing):
+        """Whether a range holding only today's bar is due for another download"""
+        if np.busday_count(missing[0], missing[1]) == 0:
+            return False
+        fetched_at = self._live_fetched.get(ticker)
+        return fetched_at is None or time.monotonic() - fetched_at >= LIVE_BAR_TTL
+
+    def stored_tickers(self, tickers):
+        """The upper-case tickers among tickers that have price history stored; never downloads"""
+        tickers = [ticker.upper() for ticker in tickers]
+        if not tickers:
+            return set()
+        return set(self._get_coverages(tickers))
+
+    def _get_coverages(self, tickers):
+        conn = self._connect()
+        c = conn.cursor()
+        placeholders = ', '.join('?' for _ in tickers)
+        c.execute(PRICE_COVERAGE_QUERY.format(placeholders=placeholders), tickers)
+        coverages = {row[0]: (row[1], row[2]) for row in c.fetchall()}
+        return coverages
+
+    def _missing_ranges(self, coverage, start, end):
+        """Ranges that must be downloaded so that coverage stays contiguous and spans [start, end)"""
+        if coverage is None:
+            return [(start, end)]
+
+        cov_start, cov_end = coverage
+        ranges = []
+
+        if start < cov_start:
+            ranges.append((start, cov_start))
+        if end > cov_end:
+            ranges.append((cov_end, end))
+
+        return ranges
+
+    def _store_range(self, ticker, data, start, end, coverage):
+        """Store the bars downloaded for [start, end) and return the updated coverage"""
+        if not data.empty:
+            self._upsert(ticker, data)
+
+        # An empty answer is only trusted when the range has no weekdays in it;
+        # otherwise it may be a transient failure and is retried next time.
+        if data.empty and np.busday_count(start, end) > 0:
+            return coverage
+
+        # Today's bar is still forming, so coverage never extends past today
+        today = datetime.now().strftime('%Y-%m-%d')
+        covered_end = min(end, today)
+
+        if coverage is None:
+            if covered_end <= start:
+                return None
+            new_coverage = (start, covered_end)
+        else:
+            new_coverage = (min(start, coverage[0]), max(covered_end, coverage[1]))
+
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('''
+        INSERT OR REPLACE INTO price_coverage (ticker, start_date, end_date, updated_at)
+        VALUES (?, ?, ?, datetime('now'))
+        ''', (ticker, new_coverage[0], new_coverage[1]))
+        conn.commit()
+
+        return new_coverage
+
+    def _download(self, tickers, start, end):
+        """Download [start, end) for all tickers in one request and split it per ticker"""
+        data = yf.download(tickers, start=start, end=end, progress=False)
+        frames = {ticker: pd.DataFrame(columns=PRICE_COLUMNS) for ticker in tickers}
+
+        if data is None or data.empty:
+            return frames
+
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(1):
+                    continue
+                frame = data.xs(ticker, axis=1, level=1)
+            else:
+                frame = data
+
+            frame = frame[[col for col in PRICE_COLUMNS if col in frame.columns]]
+            # Grouped downloads pad every ticker to the union of trading days
+            frames[ticker] = frame.dropna(how='all')
+
+        return frames
+
+    def _upsert(self, ticker, data):
+        data = data.reindex(columns=PRICE_COLUMNS).astype(float)
+
+        rows = [
+            (ticker, date.strftime('%Y-%m-%d')) + tuple(None if np.isnan(v) else v for v in values)
+            for date, values in zip(data.index, data.itertuples(index=False, name=None))
+        ]
+
+        conn = self._connect()
+        c = conn.cursor()
+        c.executemany('''
+        INSERT OR REPLACE INTO price_history (ticker, date, open, high, low, close, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+
+    def _read(self, tickers, start, end):
+        conn = self._connect()
+        placeholders = ', '.join('?' for _ in tickers)
+        data = pd.read_sql_query(
+            PRICE_HISTORY_QUERY.format(placeholders=placeholders), conn, params=list(tickers) + [start, end]
+        )
+
+        data.columns = ['Ticker', 'Date'] + PRICE_COLUMNS
+        data['Date'] = pd.to_datetime(data['Date'])
+        grouped = dict(tuple(data.groupby('Ticker', sort=False)))
+
+        frames = {}
+        for ticker in tickers:
+            frame = grouped.get(ticker)
+            if frame is None:
+                frames[ticker] = pd.DataFrame(columns=PRICE_COLUMNS)
+            else:
+                frames[ticker] = frame.drop(columns='Ticker').set_index('Date')
+        return frames
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Return the process-wide price store shared by all sessions"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
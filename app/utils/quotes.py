@@ -0,0 +1,212 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utils.cache import TTLCache
+
+# How long a quote is reused before it is fetched again, in seconds
+QUOTE_TTL = 60
+QUOTE_COLUMNS = ['Price', 'Previous Close']
+
+# Indices shown in the dashboard's market overview
+MARKET_INDICES = {
+    '^GSPC': 'S&P 500',
+    '^DJI': 'Dow Jones',
+    '^IXIC': 'NASDAQ',
+    '^RUT': 'Russell 2000'
+}
+
+# Seconds between background refreshes of the index quotes
+INDEX_REFRESH_INTERVAL = 60
+
+
+def download_quotes(tickers):
+    """Download the last few sessions for all tickers in one request.
+
+    Returns {ticker: (price, previous close)} for the tickers that have data, or
+    None if the download itself failed.
+    """
+    try:
+        # A few days back so the previous close survives weekends and holidays
+        data = yf.download(tickers, period="5d", progress=False)
+    except Exception as e:
+        print(f"Error downloading quotes for {', '.join(tickers)}: {str(e)}")
+        return None
+
+    if data is None or data.empty:
+        return {}
+
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+
+    quotes = {}
+    for ticker in tickers:
+        if ticker not in close.columns:
+            continue
+        series = close[ticker].dropna()
+        if series.empty:
+            continue
+        previous_close = float(series.iloc[-2]) if len(series) > 1 else np.nan
+        quotes[ticker] = (float(series.iloc[-1]), previous_close)
+
+    return quotes
+
+
+class QuoteService:
+    """Latest price and previous close for many tickers, fetched in one batched download.
+
+    Quotes are cached per ticker for ttl seconds and shared by every session, so
+    a page only downloads the tickers nobody has asked for recently, and all of
+    those in a single request. Tickers without data (e.g. delisted) are cached
+    as NaN too. A ticker already being downloaded for another session is waited
+    for rather than requested again, while downloads of other tickers run
+    side by side.
+    """
+
+    def __init__(self, ttl=QUOTE_TTL, maxsize=5000):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def get_quotes(self, tickers):
+        """Return a DataFrame indexed by ticker with Price and Previous Close (NaN when unavailable)"""
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        quotes = {}
+
+        missing = self._from_cache(tickers, quotes)
+        if missing:
+            # Claim the tickers nobody is downloading; wait for the others
+            done = threading.Event()
+            to_fetch, waiting = [], []
+            with self._inflight_lock:
+                for ticker in self._from_cache(missing, quotes):
+                    if ticker in self._inflight:
+                        waiting.append((ticker, self._inflight[ticker]))
+                    else:
+                        self._inflight[ticker] = done
+                        to_fetch.append(ticker)
+
+            if to_fetch:
+                try:
+                    fetched = download_quotes(to_fetch)
+                    # A failed download is not cached, so the next render retries it
+                    if fetched is not None:
+                        for ticker in to_fetch:
+                            quote = fetched.get(ticker, (np.nan, np.nan))
+                            self.cache.set(ticker, quote)
+                            quotes[ticker] = quote
+                finally:
+                    with self._inflight_lock:
+                        for ticker in to_fetch:
+                            del self._inflight[ticker]
+                    done.set()
+
+            for ticker, event in waiting:
+                event.wait()
+                quote = self.cache.get(ticker)
+                if quote is not None:
+                    quotes[ticker] = quote
+
+        return pd.DataFrame.from_dict(
+            {ticker: quotes.get(ticker, (np.nan, np.nan)) for ticker in tickers},
+            orient='index', columns=QUOTE_COLUMNS
+        )
+
+    def get_quote(self, ticker):
+        """Return (price, previous close) for one ticker"""
+        row = self.get_quotes([ticker]).iloc[0]
+        return row['Price'], row['Previous Close']
+
+    def _from_cache(self, tickers, quotes):
+        """Fill quotes from the cache and return the tickers that still need fetching"""
+        missing = []
+        for ticker in tickers:
+            quote = self.cache.get(ticker)
+            if quote is None:
+                missing.append(ticker)
+            else:
+                quotes[ticker] = quote
+        return missing
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_quote_service():
+    """Return the process-wide quote service shared by all sessions"""
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = QuoteService()
+        return _default_service
+
+
+class QuoteRefresher:
+    """Latest quotes for a fixed set of tickers, kept in memory by a background thread.
+
+    A daemon thread downloads all tickers in one grouped request every interval
+    seconds. Readers only copy the last snapshot, so they never wait on the
+    network; before the first download completes the snapshot is empty.
+    """
+
+    def __init__(self, tickers, interval=INDEX_REFRESH_INTERVAL):
+        self.tickers = [ticker.upper() for ticker in tickers]
+        self.interval = interval
+        self.updated_at = None
+        self._quotes = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the refresh thread if it isn't running yet"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="quote-refresher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        """Download the quotes now; a failed download keeps the previous snapshot"""
+        quotes = download_quotes(self.tickers)
+        if quotes:
+            with self._lock:
+                self._quotes = quotes
+                self.updated_at = time.time()
+
+    def get_quotes(self):
+        """Return the in-memory snapshot as a DataFrame indexed by ticker with Price and Previous Close"""
+        self.start()
+        with self._lock:
+            quotes = self._quotes
+        return pd.DataFrame.from_dict(
+            {ticker: quotes[ticker] for ticker in self.tickers if ticker in quotes},
+            orient='index', columns=QUOTE_COLUMNS
+        )
+
+
+_index_refresher = None
+_index_refresher_lock = threading.Lock()
+
+
+def get_index_refresher():
+    """Return the process-wide refresher for MARKET_INDICES, started on first use"""
+    global _index_refresher
+    with _index_refresher_lock:
+        if _index_refresher is None:
+            _index_refresher = QuoteRefresher(list(MARKET_INDICES))
+    _index_refresher.start()
+    return _index_refresher
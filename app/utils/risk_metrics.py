@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+RISK_FREE_RATE = 0.02
+# Index that Beta and Alpha are measured against
+BENCHMARK = '^GSPC'
+TRADING_DAYS = 252
+
+# Column order matches the dict returned by StockAnalyzer.calculate_risk_metrics
+RISK_METRIC_COLUMNS = [
+    'Volatility (Daily)', 'Volatility (Annual)', 'Sharpe Ratio (Annual)',
+    'Sortino Ratio (Annual)', 'Max Drawdown', 'Beta', 'Alpha'
+]
+
+def _masked_mean(values, mask):
+    """Column means over the entries selected by mask (NaN for empty columns)"""
+    count = mask.sum(axis=0)
+    total = np.where(mask, values, 0.0).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+def _masked_std(values, mask):
+    """Sample (ddof=1) column standard deviations over the entries selected by mask"""
+    count = mask.sum(axis=0)
+    deviations = np.where(mask, values - _masked_mean(values, mask), 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 1, np.sqrt((deviations ** 2).sum(axis=0) / (count - 1)), np.nan)
+
+def calculate_risk_metrics_panel(returns, benchmark_returns=None, risk_free_rate=RISK_FREE_RATE):
+    """Calculate risk metrics for every column of a daily returns matrix at once.
+
+    returns is a DataFrame of daily returns (dates x tickers, NaN where a ticker
+    has no data) and benchmark_returns an optional Series of benchmark daily
+    returns. Returns a DataFrame indexed by ticker with RISK_METRIC_COLUMNS,
+    matching StockAnalyzer.calculate_risk_metrics for each column.
+    """
+    values = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+
+    # Volatility, Sharpe and Sortino
+    daily_volatility = _masked_std(values, valid)
+    annual_volatility = daily_volatility * np.sqrt(TRADING_DAYS)
+    excess_return = _masked_mean(values, valid) * TRADING_DAYS - risk_free_rate
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe_ratio = np.where(annual_volatility > 0, excess_return / annual_volatility, 0)
+
+        negative = valid & (values < 0)
+        downside_deviation = np.where(
+            negative.any(axis=0), _masked_std(values, negative) * np.sqrt(TRADING_DAYS), 0.0001
+        )
+        sortino_ratio = np.where(downside_deviation > 0, excess_return / downside_deviation, 0)
+
+        # Maximum drawdown; rows before a ticker's first return are left out
+        cumulative_returns = np.cumprod(np.where(valid, 1 + values, 1.0), axis=0)
+        started = np.logical_or.accumulate(valid, axis=0)
+        cumulative_returns = np.where(started, cumulative_returns, np.nan)
+        running_max = np.fmax.accumulate(cumulative_returns, axis=0)
+        max_drawdown = np.fmin.reduce(cumulative_returns / running_max - 1, axis=0)
+
+    # Beta and Alpha against the benchmark over the dates both have returns
+    beta = np.full(values.shape[1], np.nan)
+    alpha = np.full(values.shape[1], np.nan)
+
+    if benchmark_returns is not None and not benchmark_returns.empty:
+        benchmark = benchmark_returns.reindex(returns.index).to_numpy(dtype=float)[:, None]
+        common = valid & ~np.isnan(benchmark)
+        count = common.sum(axis=0)
+
+        stock_mean = _masked_mean(values, common)
+        market_mean = _masked_mean(np.broadcast_to(benchmark, values.shape), common)
+
+        stock_centered = np.where(common, values - stock_mean, 0.0)
+        market_centered = np.where(common, benchmark - market_mean, 0.0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = np.einsum('ij,ij->j', stock_centered, market_centered) / (count - 1)
+            benchmark_variance = np.einsum('ij,ij->j', market_centered, market_centered) / (count - 1)
+            beta = np.where((count > 1) & (benchmark_variance > 0), covariance / benchmark_variance, np.nan)
+
+        # Jensen's Alpha
+        alpha = stock_mean * TRADING_DAYS - (
+            risk_free_rate + beta * (market_mean * TRADING_DAYS - risk_free_rate)
+        )
+
+    return pd.DataFrame({
+        'Volatility (Daily)': daily_volatility,
+        'Volatility (Annual)': annual_volatility,
+        'Sharpe Ratio (Annual)': sharpe_ratio,
+        'Sortino Ratio (Annual)': sortino_ratio,
+        'Max Drawdown': max_drawdown,
+        'Beta': beta,
+        'Alpha': alpha
+    }, index=returns.columns)[RISK_METRIC_COLUMNS]
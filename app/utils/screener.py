@@ -0,0 +1,234 @@
+import operator
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import TTLCache
+from utils.database import get_connection
+from utils.indicators import build_price_panel, calculate_indicator_panel
+from utils.price_store import get_price_store
+from utils.risk_metrics import BENCHMARK, calculate_risk_metrics_panel
+
+# Ticker,Name,Sector CSV of the stocks to screen (e.g. S&P 500 or Russell constituents)
+UNIVERSE_PATH = 'data/universe.csv'
+
+# Enough calendar days for MA200 and a year of risk metrics
+LOOKBACK_DAYS = 400
+
+# Tickers per price store request; bounds the size of the indicator panels
+BATCH_SIZE = 500
+
+SCREEN_TTL = 300
+
+# Screener fields (screener_metrics columns) and their display labels
+SCREEN_COLUMNS = {
+    'name': 'Name',
+    'sector': 'Sector',
+    'price': 'Price',
+    'change': 'Change (1D)',
+    'volume': 'Volume',
+    'rsi': 'RSI',
+    'ma20': 'MA20',
+    'ma50': 'MA50',
+    'ma200': 'MA200',
+    'macd': 'MACD',
+    'macd_signal': 'Signal Line',
+    'volatility': 'Volatility',
+    'sharpe': 'Sharpe Ratio',
+    'sortino': 'Sortino Ratio',
+    'max_drawdown': 'Max Drawdown',
+    'beta': 'Beta',
+    'alpha': 'Alpha',
+}
+
+TEXT_FIELDS = {'name', 'sector'}
+
+# Short names accepted in queries
+FIELD_ALIASES = {
+    'vol': 'volatility',
+    'drawdown': 'max_drawdown',
+    'dd': 'max_drawdown',
+    'signal': 'macd_signal',
+    'chg': 'change',
+}
+
+# Source of each numeric field: indicator panel column or risk metric column
+INDICATOR_FIELDS = {
+    'change': 'Daily_Return', 'rsi': 'RSI', 'ma20': 'MA20', 'ma50': 'MA50', 'ma200': 'MA200',
+    'macd': 'MACD', 'macd_signal': 'Signal_Line',
+}
+RISK_FIELDS = {
+    'volatility': 'Volatility (Annual)', 'sharpe': 'Sharpe Ratio (Annual)', 'sortino': 'Sortino Ratio (Annual)',
+    'max_drawdown': 'Max Drawdown', 'beta': 'Beta', 'alpha': 'Alpha',
+}
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+
+CONDITION = re.compile(r'^\s*([A-Za-z_]\w*)\s*(<=|>=|==|!=|=|<|>)\s*(.+?)\s*$')
+NUMBER = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?%?$')
+
+SCREEN_CACHE = TTLCache(maxsize=1, ttl=SCREEN_TTL)
+
+def load_universe(path=UNIVERSE_PATH):
+    """Universe DataFrame indexed by upper-case ticker with name and sector columns"""
+    universe = pd.read_csv(path, dtype=str)
+    universe.columns = [column.strip().lower() for column in universe.columns]
+    universe['ticker'] = universe['ticker'].str.strip().str.upper()
+    universe = universe.dropna(subset=['ticker']).drop_duplicates('ticker').set_index('ticker')
+    return universe.reindex(columns=['name', 'sector'])
+
+def _latest_metrics(close, volume, benchmark_returns):
+    """Latest indicator values and risk metrics for every column of a close panel"""
+    close = close.sort_index()
+    volume = volume.reindex_like(close)
+    panel = calculate_indicator_panel(close, volume)
+    risk = calculate_risk_metrics_panel(panel['Daily_Return'], benchmark_returns)
+
+    # Last known value per ticker, so tickers that stopped trading keep their final bar
+    table = pd.DataFrame({'price': close.ffill().iloc[-1], 'volume': volume.ffill().iloc[-1]})
+    for field, column in INDICATOR_FIELDS.items():
+        table[field] = panel[column].ffill().iloc[-1]
+    for field, column in RISK_FIELDS.items():
+        table[field] = risk[column]
+
+    return table
+
+def build_screen_table(universe, price_store=None, end_date=None, batch_size=BATCH_SIZE):
+    """Compute screener fields for every ticker of a universe from the price store.
+
+    Indicators and risk metrics are computed in vectorized passes over batches of
+    batch_size tickers. Returns a DataFrame indexed by ticker with the
+    SCREEN_COLUMNS fields; tickers without price history are left out.
+    """
+    price_store = price_store or get_price_store()
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=LOOKBACK_DAYS)
+
+    benchmark = price_store.get_prices(BENCHMARK, start_date, end_date)
+    benchmark_returns = None if benchmark.empty else benchmark['Close'].astype(float).pct_change()
+
+    tickers = universe.index.tolist()
+    tables = []
+    for first in range(0, len(tickers), batch_size):
+        frames = price_store.get_prices_batch(tickers[first:first + batch_size], start_date, end_date)
+        close = build_price_panel(frames, 'Close')
+        if close.empty:
+            continue
+        tables.append(_latest_metrics(close, build_price_panel(frames, 'Volume'), benchmark_returns))
+
+    metrics = pd.concat(tables) if tables else pd.DataFrame(columns=list(SCREEN_COLUMNS)[2:], dtype=float)
+    return universe.join(metrics, how='inner')[list(SCREEN_COLUMNS)]
+
+def update_screener_metrics(universe_path=UNIVERSE_PATH, price_store=None, conn=None):
+    """Recompute the screener table for the universe CSV and store it; returns the number of tickers"""
+    conn = conn or get_connection()
+    c = conn.cursor()
+
+    table = build_screen_table(load_universe(universe_path), price_store)
+    computed_on = datetime.now().strftime('%Y-%m-%d')
+
+    rows = [
+        (ticker,) + tuple(None if pd.isna(value) else value for value in values) + (computed_on,)
+        for ticker, values in zip(table.index, table.itertuples(index=False, name=None))
+    ]
+    columns = ', '.join(SCREEN_COLUMNS)
+    placeholders = ', '.join('?' for _ in range(len(SCREEN_COLUMNS) + 2))
+
+    # Replace the whole table in one transaction so readers never see a partial screen
+    c.execute("DELETE FROM screener_metrics")
+    c.executemany(
+        f"INSERT INTO screener_metrics (ticker, {columns}, computed_on) VALUES ({placeholders})", rows
+    )
+    conn.commit()
+    SCREEN_CACHE.clear()
+
+    return len(rows)
+
+def _read_screen_table(conn):
+    table = pd.read_sql_query(
+        f"SELECT ticker, {', '.join(SCREEN_COLUMNS)}, computed_on FROM screener_metrics", conn, index_col='ticker'
+    )
+    numeric = [field for field in SCREEN_COLUMNS if field not in TEXT_FIELDS]
+    table[numeric] = table[numeric].astype(float)
+    return table
+
+def load_screen_table(conn=None):
+    """The stored screener table (indexed by ticker), kept in memory for SCREEN_TTL seconds"""
+    return SCREEN_CACHE.get_or_compute('table', lambda: _read_screen_table(conn or get_connection()))
+
+def _resolve_field(name):
+    field = FIELD_ALIASES.get(name.lower(), name.lower())
+    if field not in SCREEN_COLUMNS:
+        raise ValueError(f"Unknown screener field '{name}'. Available fields: {', '.join(SCREEN_COLUMNS)}")
+    return field
+
+def _parse_value(text):
+    """Number (a trailing % divides by 100), field reference or plain text of a condition"""
+    if NUMBER.match(text):
+        return ('number', float(text.rstrip('%')) / (100 if text.endswith('%') else 1))
+    if len(text) > 1 and text[0] == text[-1] and text[0] in '\'"':
+        return ('text', text[1:-1])
+    field = FIELD_ALIASES.get(text.lower(), text.lower())
+    if field in SCREEN_COLUMNS:
+        return ('field', field)
+    return ('text', text)
+
+def parse_screen_query(query):
+    """Parse a query such as "RSI<30 and beta<1 and vol<20%".
+
+    Conditions are joined by "and" (or commas), which binds tighter than "or".
+    Returns a list of or-groups, each a list of (field, operator, value) tuples.
+    """
+    groups = []
+    for group in re.split(r'\s+or\s+', query.strip(), flags=re.IGNORECASE):
+        conditions = []
+        for condition in re.split(r'\s+and\s+|\s*,\s*', group, flags=re.IGNORECASE):
+            match = CONDITION.match(condition)
+            if not match:
+                raise ValueError(f"Can't parse condition '{condition}'. Use e.g. rsi<30 or vol<20%.")
+
+            field = _resolve_field(match.group(1))
+            op = match.group(2)
+            kind, value = _parse_value(match.group(3))
+
+            if field in TEXT_FIELDS and (kind != 'text' or op not in ('=', '==', '!=')):
+                raise ValueError(f"'{field}' can only be compared with = or != to a text value")
+            if field not in TEXT_FIELDS and kind == 'text':
+                raise ValueError(f"'{field}' must be compared with a number or another numeric field")
+
+            conditions.append((field, op, (kind, value)))
+        groups.append(conditions)
+    return groups
+
+def _condition_mask(table, field, op, value):
+    kind, value = value
+    if field in TEXT_FIELDS:
+        return OPERATORS[op](table[field].fillna('').str.lower().to_numpy(), value.lower())
+
+    values = table[field].to_numpy(dtype=float)
+    other = table[value].to_numpy(dtype=float) if kind == 'field' else value
+    # NaN compares False, so tickers missing a field never match a condition on it
+    return OPERATORS[op](values, other)
+
+def screen(table, query=None, sort_by=None, ascending=True, limit=None):
+    """Rows of a screener table matching query, optionally sorted by a field and limited"""
+    mask = np.ones(len(table), dtype=bool)
+    if query and query.strip():
+        mask = np.zeros(len(table), dtype=bool)
+        for conditions in parse_screen_query(query):
+            group_mask = np.ones(len(table), dtype=bool)
+            for field, op, value in conditions:
+                group_mask &= _condition_mask(table, field, op, value)
+            mask |= group_mask
+
+    result = table[mask]
+    if sort_by:
+        result = result.sort_values(_resolve_field(sort_by), ascending=ascending, na_position='last')
+    if limit:
+        result = result.head(limit)
+    return result
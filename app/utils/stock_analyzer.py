@@ -2,140 +2,122 @@ import pandas as pd
 import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
+from utils.price_store import get_price_store
+from utils.indicators import calculate_indicator_panel, build_price_panel, INDICATOR_COLUMNS
+from utils.risk_metrics import calculate_risk_metrics_panel
+from utils.suitability import evaluate_suitability_table, SUITABILITY_FACTORS, MATCH_RATINGS, MATCH_DESCRIPTIONS
 
 class StockAnalyzer:
-    def __init__(self):
+    def __init__(self, price_store=None):
         self.risk_tolerance = None
+        self.price_store = price_store if price_store is not None else get_price_store()
     
     def fetch_stock_data(self, ticker, start_date, end_date):
-        """Fetch historical stock data"""
+        """Fetch historical stock data, served from the local price store when already downloaded"""
         try:
-            data = yf.download(ticker, start=start_date, end=end_date)
-            if data.empty:
-                return None
-            return data
+            data = self.price_store.get_prices(ticker, start_date, end_date)
+            return self._to_download_layout(data, ticker)
         except:
             return None
     
-    def process_stock_data(self, data):
-        """Process stock data and handle DatetimeIndex"""
+    def fetch_stock_data_batch(self, tickers, start_date, end_date):
+        """Fetch historical data for several tickers with one grouped download; returns {ticker: data or None}"""
+        try:
+            frames = self.price_store.get_prices_batch(tickers, start_date, end_date)
+        except:
+            return {ticker: None for ticker in tickers}
+        
+        return {ticker: self._to_download_layout(frames.get(ticker.upper()), ticker) for ticker in tickers}
+    
+    def _to_download_layout(self, data, ticker):
+        """Give price store bars the (Price, Ticker) column layout returned by yf.download"""
         if data is None or data.empty:
             return None
-            
-        # Convert DatetimeIndex to regular datetime column if needed
-        if isinstance(data.index, pd.DatetimeIndex):
-            data = data.reset_index()
-            data['Date'] = data['Date'].dt.strftime('%Y-%m-%d')
         
+        data = data[['Close', 'High', 'Low', 'Open', 'Volume']]
+        data.columns = pd.MultiIndex.from_product([data.columns, [ticker]], names=['Price', 'Ticker'])
         return data
-
+    
     def calculate_technical_indicators(self, data):
         """Calculate technical indicators for the stock data"""
         if data is None or data.empty:
             return None
         
-        # Process data to handle DatetimeIndex
-        data = self.process_stock_data(data)
-        
-        # Set Date as index again for calculations
-        if 'Date' in data.columns:
-            data = data.set_index('Date')
-        
-        # Calculate daily returns
-        if isinstance(data['Close'], pd.DataFrame) or len(data['Close'].shape) > 1:
-            data['Close'] = data['Close'].squeeze()  # Convert to 1D Series if it's a DataFrame or 2D array
-
-        data['Daily_Return'] = data['Close'].pct_change()
-        
-        # Calculate moving averages
-        data['MA20'] = data['Close'].rolling(window=20).mean()
-        data['MA50'] = data['Close'].rolling(window=50).mean()
-        data['MA200'] = data['Close'].rolling(window=200).mean()
-        
-        # Calculate Bollinger Bands
-        data['STD20'] = data['Close'].rolling(window=20).std()
-        data['Upper_Band'] = data['MA20'] + (data['STD20'] * 2)
-        data['Lower_Band'] = data['MA20'] - (data['STD20'] * 2)
+        data = data.copy()
         
-        # Calculate RSI
-        delta = data['Close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
+        # Work on 1D Close/Volume series even for (Price, Ticker) column layouts
+        close = data['Close']
+        volume = data['Volume']
+        if isinstance(close, pd.DataFrame):
+            close = close.squeeze(axis=1)
+            volume = volume.squeeze(axis=1)
         
-        # Calculate MACD
-        data['EMA12'] = data['Close'].ewm(span=12, adjust=False).mean()
-        data['EMA26'] = data['Close'].ewm(span=26, adjust=False).mean()
-        data['MACD'] = data['EMA12'] - data['EMA26']
-        data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-        data['MACD_Histogram'] = data['MACD'] - data['Signal_Line']
+        panel = calculate_indicator_panel(close.to_frame('value'), volume.to_frame('value'))
         
-        # Calculate volume moving average
-        data['Volume_MA50'] = data['Volume'].rolling(window=50).mean()
+        for column in INDICATOR_COLUMNS:
+            data[column] = panel[column]['value']
         
         return data
     
+    def calculate_technical_indicators_batch(self, tickers_data):
+        """Calculate technical indicators for several tickers; returns {ticker: data with indicator columns}.
+        
+        Tickers trading on the same dates are computed in one vectorized pass, so
+        the result for each ticker matches calculate_technical_indicators. Tickers
+        without data are left out.
+        """
+        # Group by trading calendar so no ticker's rolling windows see another's holidays as gaps
+        groups = {}
+        for ticker, data in tickers_data.items():
+            if data is not None and not data.empty:
+                groups.setdefault(tuple(data.index.asi8), []).append(ticker)
+        
+        results = {}
+        for tickers in groups.values():
+            frames = {ticker: tickers_data[ticker] for ticker in tickers}
+            panel = calculate_indicator_panel(build_price_panel(frames, 'Close'), build_price_panel(frames, 'Volume'))
+            
+            for ticker, data in frames.items():
+                data = data.copy()
+                for column in INDICATOR_COLUMNS:
+                    data[column] = panel[column][ticker]
+                results[ticker] = data
+        
+        return results
+    
     def calculate_risk_metrics(self, data, benchmark_data=None):
         """Calculate risk metrics for the stock"""
         if data is None or data.empty:
             return {}
         
-        # Calculate volatility
-        daily_returns = data['Daily_Return'].dropna()
-        daily_volatility = daily_returns.std()
-        annual_volatility = daily_volatility * np.sqrt(252)  # Assuming 252 trading days in a year
-        
-        # Calculate Sharpe Ratio (assuming risk-free rate of 0.02 or 2%)
-        risk_free_rate = 0.02
-        excess_return = daily_returns.mean() * 252 - risk_free_rate
-        sharpe_ratio = excess_return / annual_volatility if annual_volatility > 0 else 0
-        
-        # Calculate Sortino Ratio (downside risk only)
-        negative_returns = daily_returns[daily_returns < 0]
-        downside_deviation = negative_returns.std() * np.sqrt(252) if len(negative_returns) > 0 else 0.0001
-        sortino_ratio = excess_return / downside_deviation if downside_deviation > 0 else 0
-        
-        # Calculate maximum drawdown
-        cumulative_returns = (1 + daily_returns).cumprod()
-        running_max = cumulative_returns.cummax()
-        drawdown = (cumulative_returns / running_max) - 1
-        max_drawdown = drawdown.min()
-        
-        # Calculate Beta and Alpha if benchmark data is provided
-        beta = np.nan
-        alpha = np.nan
-        
+        metrics = self.calculate_risk_metrics_batch({'stock': data}, benchmark_data)
+        return metrics.loc['stock'].to_dict()
+    
+    def calculate_risk_metrics_batch(self, tickers_data, benchmark_data=None):
+        """Calculate risk metrics for several tickers at once; returns a DataFrame indexed by ticker"""
+        returns = pd.DataFrame({
+            ticker: self._daily_returns(data)
+            for ticker, data in tickers_data.items()
+            if data is not None and not data.empty
+        })
+        
+        # Benchmark returns are derived once per call, without modifying benchmark_data
+        benchmark_returns = None
         if benchmark_data is not None and not benchmark_data.empty:
-            # Calculate benchmark returns
-            benchmark_data['Daily_Return'] = benchmark_data['Close'].pct_change()
-            benchmark_returns = benchmark_data['Daily_Return'].dropna()
-            
-            # Align the data
-            common_dates = daily_returns.index.intersection(benchmark_returns.index)
-            if len(common_dates) > 0:
-                aligned_returns = daily_returns.loc[common_dates]
-                aligned_benchmark = benchmark_returns.loc[common_dates]
-                
-                # Calculate Beta
-                covariance = aligned_returns.cov(aligned_benchmark)
-                benchmark_variance = aligned_benchmark.var()
-                beta = covariance / benchmark_variance if benchmark_variance > 0 else np.nan
-                
-                # Calculate Alpha (Jensen's Alpha)
-                stock_return = aligned_returns.mean() * 252
-                market_return = aligned_benchmark.mean() * 252
-                alpha = stock_return - (risk_free_rate + beta * (market_return - risk_free_rate))
+            benchmark_returns = self._daily_returns(benchmark_data)
         
-        return {
-            'Volatility (Daily)': daily_volatility,
-            'Volatility (Annual)': annual_volatility,
-            'Sharpe Ratio (Annual)': sharpe_ratio,
-            'Sortino Ratio (Annual)': sortino_ratio,
-            'Max Drawdown': max_drawdown,
-            'Beta': beta,
-            'Alpha': alpha
-        }
+        return calculate_risk_metrics_panel(returns, benchmark_returns)
+    
+    def _daily_returns(self, data):
+        """Daily_Return column as a 1D series, computed from Close if missing"""
+        if 'Daily_Return' in data.columns:
+            returns = data['Daily_Return']
+        else:
+            returns = data['Close'].pct_change()
+        
+        if isinstance(returns, pd.DataFrame):
+            returns = returns.squeeze(axis=1)
+        return returns
     
     def fetch_fundamental_data(self, ticker):
         """Fetch fundamental data for a stock"""
@@ -195,145 +177,25 @@ class StockAnalyzer:
         if not risk_metrics or not risk_tolerance:
             return None
         
-        # Extract risk metrics
-        volatility = risk_metrics.get('Volatility (Annual)', 0) * 100  # Convert to percentage
-        beta = risk_metrics.get('Beta', 1.0)
-        sharpe = risk_metrics.get('Sharpe Ratio (Annual)', 0)
-        max_drawdown = abs(risk_metrics.get('Max Drawdown', 0)) * 100  # Convert to percentage
-        
         # Get user's risk tolerance score
         risk_score = risk_tolerance.get('score', 50)
         
-        # Evaluate each risk factor
-        volatility_rating = self._evaluate_volatility(volatility, risk_score)
-        beta_rating = self._evaluate_beta(beta, risk_score)
-        sharpe_rating = self._evaluate_sharpe(sharpe)
-        drawdown_rating = self._evaluate_drawdown(max_drawdown, risk_score)
+        row = evaluate_suitability_table(pd.DataFrame([risk_metrics], index=[ticker]), risk_score).iloc[0]
+        match_rating = row['Match Rating']
         
-        # Calculate overall suitability score (0-100)
-        overall_score = (
-            volatility_rating['Score'] * 0.3 +
-            beta_rating['Score'] * 0.3 +
-            sharpe_rating['Score'] * 0.2 +
-            drawdown_rating['Score'] * 0.2
-        )
-        
-        # Determine match rating
-        match_rating = "Excellent Match"
-        match_description = f"{ticker} aligns very well with your risk tolerance."
-        
-        if overall_score < 70:
-            match_rating = "Good Match"
-            match_description = f"{ticker} generally aligns with your risk tolerance with some considerations."
-        
-        if overall_score < 50:
-            match_rating = "Moderate Match"
-            match_description = f"{ticker} may be more volatile than your risk tolerance suggests. Consider as a smaller position."
-        
-        if overall_score < 30:
-            match_rating = "Poor Match"
-            match_description = f"{ticker} appears too risky for your risk profile. Consider alternatives or a very small position."
-        
-        return {
-            'Overall Suitability Score': overall_score,
+        suitability = {
+            'Overall Suitability Score': float(row['Overall Suitability Score']),
             'Match Rating': match_rating,
-            'Match Description': match_description,
-            'Volatility': volatility_rating,
-            'Beta': beta_rating,
-            'Sharpe Ratio': sharpe_rating,
-            'Max Drawdown': drawdown_rating
+            'Match Description': MATCH_DESCRIPTIONS[MATCH_RATINGS.index(match_rating)].format(ticker=ticker)
         }
-    
-    def _evaluate_volatility(self, volatility, risk_score):
-        """Evaluate volatility against risk tolerance"""
-        # Conservative: <15%, Moderate: 15-25%, Aggressive: >25%
-        if risk_score < 30:  # Conservative
-            if volatility < 15:
-                return {'Rating': 'Good', 'Score': 90}
-            elif volatility < 20:
-                return {'Rating': 'Moderate', 'Score': 60}
-            else:
-                return {'Rating': 'High', 'Score': 30}
-        elif risk_score < 70:  # Moderate
-            if volatility < 15:
-                return {'Rating': 'Low', 'Score': 70}
-            elif volatility < 25:
-                return {'Rating': 'Good', 'Score': 90}
-            else:
-                return {'Rating': 'High', 'Score': 50}
-        else:  # Aggressive
-            if volatility < 15:
-                return {'Rating': 'Low', 'Score': 50}
-            elif volatility < 25:
-                return {'Rating': 'Moderate', 'Score': 70}
-            else:
-                return {'Rating': 'Good', 'Score': 90}
-    
-    def _evaluate_beta(self, beta, risk_score):
-        """Evaluate beta against risk tolerance"""
-        if np.isnan(beta):
-            return {'Rating': 'Neutral', 'Score': 50}
+        for name in SUITABILITY_FACTORS:
+            suitability[name] = {'Rating': row[f'{name} Rating'], 'Score': int(row[f'{name} Score'])}
         
-        # Conservative: <0.8, Moderate: 0.8-1.2, Aggressive: >1.2
-        if risk_score < 30:  # Conservative
-            if beta < 0.8:
-                return {'Rating': 'Good', 'Score': 90}
-            elif beta < 1.0:
-                return {'Rating': 'Moderate', 'Score': 60}
-            else:
-                return {'Rating': 'High', 'Score': 30}
-        elif risk_score < 70:  # Moderate
-            if beta < 0.8:
-                return {'Rating': 'Low', 'Score': 70}
-            elif beta < 1.2:
-                return {'Rating': 'Good', 'Score': 90}
-            else:
-                return {'Rating': 'High', 'Score': 50}
-        else:  # Aggressive
-            if beta < 0.8:
-                return {'Rating': 'Low', 'Score': 50}
-            elif beta < 1.2:
-                return {'Rating': 'Moderate', 'Score': 70}
-            else:
-                return {'Rating': 'Good', 'Score': 90}
-    
-    def _evaluate_sharpe(self, sharpe):
-        """Evaluate Sharpe ratio"""
-        if sharpe < 0:
-            return {'Rating': 'Poor', 'Score': 20}
-        elif sharpe < 0.5:
-            return {'Rating': 'Below Average', 'Score': 40}
-        elif sharpe < 1.0:
-            return {'Rating': 'Average', 'Score': 60}
-        elif sharpe < 1.5:
-            return {'Rating': 'Good', 'Score': 80}
-        else:
-            return {'Rating': 'Excellent', 'Score': 100}
+        return suitability
     
-    def _evaluate_drawdown(self, max_drawdown, risk_score):
-        """Evaluate maximum drawdown against risk tolerance"""
-        # Conservative: <15%, Moderate: 15-30%, Aggressive: >30%
-        if risk_score < 30:  # Conservative
-            if max_drawdown < 15:
-                return {'Rating': 'Good', 'Score': 90}
-            elif max_drawdown < 25:
-                return {'Rating': 'Moderate', 'Score': 60}
-            else:
-                return {'Rating': 'High', 'Score': 30}
-        elif risk_score < 70:  # Moderate
-            if max_drawdown < 15:
-                return {'Rating': 'Low', 'Score': 70}
-            elif max_drawdown < 30:
-                return {'Rating': 'Good', 'Score': 90}
-            else:
-                return {'Rating': 'High', 'Score': 50}
-        else:  # Aggressive
-            if max_drawdown < 20:
-                return {'Rating': 'Low', 'Score': 50}
-            elif max_drawdown < 35:
-                return {'Rating': 'Moderate', 'Score': 70}
-            else:
-                return {'Rating': 'Good', 'Score': 90}
+    def evaluate_suitability_batch(self, risk_table, risk_tolerance):
+        """Evaluate suitability for every ticker of a risk metrics table; returns a DataFrame indexed by ticker"""
+        return evaluate_suitability_table(risk_table, risk_tolerance.get('score', 50))
 
 def safe_series_convert(value, default=0.0):
     """Safely convert pandas Series or other types to float"""
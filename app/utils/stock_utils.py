@@ -1,20 +1,102 @@
 import os
+import threading
+import time
 import requests
 from datetime import datetime, timedelta
 
+DEFAULT_LOGO_URL = "https://upload.wikimedia.org/wikipedia/commons/thumb/8/8f/Flat_stock_icon.svg/1024px-Flat_stock_icon.svg.png"
+
+# Timeout in seconds for a single HTTP request, and for a single call run by fetch_parallel
+REQUEST_TIMEOUT = 5
+FETCH_TIMEOUT = 8
+
+# Fetches running at once across all sessions, so the number of outbound calls stays bounded
+MAX_FETCH_WORKERS = 16
+
+_fetch_slots = threading.Condition()
+_fetch_running = 0
+
+class _Fetch:
+    """One call of fetch_parallel, run on its own daemon thread while it holds a fetch slot"""
+
+    def __init__(self, func, args, timeout):
+        self.func = func
+        self.args = args
+        self.deadline = time.monotonic() + timeout
+        self.finished = False
+        self.failed = False
+        self.result = None
+        self.holds_slot = True
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args)
+        except Exception:
+            self.failed = True
+        finally:
+            with _fetch_slots:
+                self.finished = True
+                self.release()
+
+    def release(self):
+        """Give the fetch slot back; called with _fetch_slots held"""
+        global _fetch_running
+        if self.holds_slot:
+            self.holds_slot = False
+            _fetch_running -= 1
+            _fetch_slots.notify_all()
+
+def fetch_parallel(calls, timeout=FETCH_TIMEOUT):
+    """Run blocking fetches concurrently, each with its own timeout.
+    
+    calls maps a key to a (func, args, fallback) tuple. Returns a dict with the
+    same keys holding each call's result, or its fallback if the call raised or
+    ran longer than timeout seconds. A call that times out gives its slot to the
+    next one straight away and its thread is abandoned, so hung calls (e.g. a
+    yf.Ticker().info without a timeout of its own) never starve other sessions.
+    """
+    global _fetch_running
+    pending = list(calls)
+    running = {}
+    results = {}
+    
+    with _fetch_slots:
+        while pending or running:
+            while pending and _fetch_running < MAX_FETCH_WORKERS:
+                key = pending.pop(0)
+                func, args, _ = calls[key]
+                fetch = running[key] = _Fetch(func, args, timeout)
+                _fetch_running += 1
+                threading.Thread(target=fetch.run, name="fetch", daemon=True).start()
+            
+            now = time.monotonic()
+            for key, fetch in list(running.items()):
+                if fetch.finished or now >= fetch.deadline:
+                    fetch.release()
+                    ok = fetch.finished and not fetch.failed
+                    results[key] = fetch.result if ok else calls[key][2]
+                    del running[key]
+            
+            if pending or running:
+                # Wake up when any fetch finishes or frees a slot, or at the next deadline
+                deadline = min((fetch.deadline for fetch in running.values()), default=None)
+                _fetch_slots.wait(None if deadline is None else max(deadline - now, 0))
+    
+    return {key: results[key] for key in calls}
+
 def get_company_logo(ticker):
     """Get company logo from clearbit API"""
     try:
         # Try to get logo from clearbit
         url = f"https://logo.clearbit.com/{ticker.lower().replace('.', '')}.com"
-        response = requests.get(url)
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             return url
         else:
             # Fallback to a default icon
-            return "https://upload.wikimedia.org/wikipedia/commons/thumb/8/8f/Flat_stock_icon.svg/1024px-Flat_stock_icon.svg.png"
+            return DEFAULT_LOGO_URL
     except:
-        return "https://upload.wikimedia.org/wikipedia/commons/thumb/8/8f/Flat_stock_icon.svg/1024px-Flat_stock_icon.svg.png"
+        return DEFAULT_LOGO_URL
 
 def get_stock_news(ticker, limit=5):
     """Get news for a specific stock using NewsAPI"""
@@ -43,7 +125,7 @@ def get_stock_news(ticker, limit=5):
             'apiKey': NEWS_API_KEY
         }
         
-        response = requests.get(base_url, params=params)
+        response = requests.get(base_url, params=params, timeout=REQUEST_TIMEOUT)
         
         if response.status_code == 200:
             news_data = response.json()
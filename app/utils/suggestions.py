@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import yfinance as yf
+
+from utils.database import get_connection, SUGGESTIONS_QUERY, SUGGESTIONS_READY_QUERY
+from utils.indicators import build_price_panel
+from utils.risk_metrics import BENCHMARK
+from utils.stock_analyzer import StockAnalyzer
+from utils.stock_utils import fetch_parallel
+
+# The nightly job can wait much longer for each ticker's company info than a page render
+INFO_TIMEOUT = 30
+
+# Stock universes per risk profile
+STOCK_UNIVERSES = {
+    'Conservative': [
+        'MSFT', 'JNJ', 'PG', 'KO', 'PEP', 'WMT', 'VZ', 'MRK', 'PFE', 'CSCO',  # Blue chips
+        'VIG', 'NOBL', 'SDY', 'DVY', 'VYM'  # Dividend ETFs
+    ],
+    'Moderately Conservative': [
+        'AAPL', 'HD', 'UNH', 'CVX', 'ABT', 'TMO', 'DHR', 'LIN', 'AVGO', 'MCD',
+        'VTI', 'VEA', 'VTV', 'SCHD', 'IWF'
+    ],
+    'Moderate': [
+        'GOOGL', 'V', 'MA', 'DIS', 'ADBE', 'NFLX', 'PYPL', 'INTC', 'AMD', 'QCOM',
+        'QQQ', 'SPY', 'IWM', 'VGT', 'XLK'
+    ],
+    'Moderately Aggressive': [
+        'NVDA', 'TSM', 'SQ', 'SHOP', 'ABNB', 'UBER', 'SNAP', 'DDOG', 'CRWD', 'NET',
+        'ARKK', 'ARKG', 'ARKF', 'SOXX', 'IGV'
+    ],
+    'Aggressive': [
+        'TSLA', 'COIN', 'MSTR', 'RBLX', 'U', 'UPST', 'AFRM', 'HOOD', 'PLTR', 'LCID',
+        'BITW', 'BLOK', 'MOON', 'YOLO', 'IPO'
+    ]
+}
+
+# Risk score upper bound and the score used to rank each bucket. The suitability
+# ladders only change at scores 30 and 70, so one score stands for the whole bucket.
+RISK_BUCKETS = [
+    ('Conservative', 30, 15),
+    ('Moderately Conservative', 50, 40),
+    ('Moderate', 70, 60),
+    ('Moderately Aggressive', 85, 77),
+    ('Aggressive', float('inf'), 92),
+]
+
+SUGGESTION_COLUMNS = [
+    'Ticker', 'Name', 'Sector', 'Suitability Score', 'Match Rating',
+    'Current Price', 'Market Cap', 'Beta', 'Volatility'
+]
+
+def get_risk_bucket(risk_score):
+    """Return the risk bucket (universe name) for a risk score"""
+    for bucket, upper_bound, _ in RISK_BUCKETS:
+        if risk_score < upper_bound:
+            return bucket
+    return RISK_BUCKETS[-1][0]
+
+def _fetch_info(ticker):
+    return yf.Ticker(ticker).info
+
+def update_suggestion_rankings(analyzer=None, conn=None):
+    """Score every universe ticker against its risk bucket and store the ranked results.
+
+    Prices for all universes and the benchmark come from one batched price store
+    request, risk metrics from one vectorized pass and each bucket is scored in
+    one vectorized pass. Current prices are the last downloaded close; company
+    info (name, sector, market cap) is fetched concurrently with INFO_TIMEOUT.
+    Returns the number of ranked rows per bucket; when no prices could be
+    loaded the existing rankings are kept.
+    """
+    analyzer = analyzer or StockAnalyzer()
+    conn = conn or get_connection()
+    c = conn.cursor()
+
+    tickers = sorted(set(ticker for universe in STOCK_UNIVERSES.values() for ticker in universe))
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=365)
+
+    data = analyzer.fetch_stock_data_batch(tickers + [BENCHMARK], start_date, end_date)
+    benchmark_data = data.pop(BENCHMARK)
+    risk_table = analyzer.calculate_risk_metrics_batch(data, benchmark_data)
+    if risk_table.empty:
+        return {}
+    last_close = build_price_panel(data, 'Close').sort_index().ffill().iloc[-1]
+
+    infos = fetch_parallel({ticker: (_fetch_info, (ticker,), {}) for ticker in risk_table.index}, timeout=INFO_TIMEOUT)
+    computed_on = end_date.strftime('%Y-%m-%d')
+
+    written = {}
+    for bucket, _, bucket_score in RISK_BUCKETS:
+        universe = risk_table.loc[risk_table.index.intersection(STOCK_UNIVERSES[bucket], sort=False)]
+        suitability = analyzer.evaluate_suitability_batch(universe, {"score": bucket_score, "profile": bucket})
+
+        rows = []
+        for ticker, risk_metrics in universe.iterrows():
+            info = infos.get(ticker) or {}
+
+            rows.append((
+                ticker,
+                info.get('shortName', ticker),
+                info.get('sector', 'N/A'),
+                suitability.at[ticker, 'Overall Suitability Score'],
+                suitability.at[ticker, 'Match Rating'],
+                float(last_close[ticker]),
+                info.get('marketCap', 0),
+                None if np.isnan(risk_metrics['Beta']) else risk_metrics['Beta'],
+                None if np.isnan(risk_metrics['Volatility (Annual)']) else risk_metrics['Volatility (Annual)'] * 100
+            ))
+
+        rows.sort(key=lambda row: row[3], reverse=True)
+
+        # Swap the bucket's rankings in one transaction so readers never see a partial list
+        c.execute("DELETE FROM suggestion_rankings WHERE risk_profile = ?", (bucket,))
+        c.executemany("""
+        INSERT INTO suggestion_rankings (
+            risk_profile, rank, ticker, name, sector, suitability_score, match_rating,
+            current_price, market_cap, beta, volatility, computed_on
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(bucket, rank) + row + (computed_on,) for rank, row in enumerate(rows, start=1)])
+        conn.commit()
+
+        written[bucket] = len(rows)
+
+    return written
+
+def get_suggestions(risk_score, user_id, limit=5, min_score=70, conn=None):
+    """Top ranked suggestions for the user's risk bucket, skipping stocks already in their portfolio.
+
+    Returns a list of dicts keyed by SUGGESTION_COLUMNS (empty when the rankings
+    haven't been computed yet) and the date they were computed on.
+    """
+    conn = conn or get_connection()
+    c = conn.cursor()
+
+    c.execute(SUGGESTIONS_QUERY, (get_risk_bucket(risk_score), min_score, user_id, limit))
+    rows = c.fetchall()
+
+    computed_on = rows[0][-1] if rows else None
+    return [dict(zip(SUGGESTION_COLUMNS, row[:-1])) for row in rows], computed_on
+
+def has_suggestion_rankings(conn=None):
+    conn = conn or get_connection()
+    return conn.execute(SUGGESTIONS_READY_QUERY).fetchone() is not None
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Risk scores below 30 are Conservative, below 70 Moderate, otherwise Aggressive
+RISK_TIER_BOUNDS = [30, 70]
+
+# Rating tables per risk factor. Each row of thresholds/ratings/scores is one risk
+# tier (a single row applies to every tier); a value below thresholds[i] gets
+# ratings[i] and scores[i], values at or above the last threshold (and NaN) the
+# last entry. Metrics are multiplied by scale (and made positive when absolute).
+SUITABILITY_FACTORS = {
+    'Volatility': {
+        'metric': 'Volatility (Annual)', 'default': 0, 'scale': 100, 'weight': 0.3,
+        'thresholds': [[15, 20], [15, 25], [15, 25]],
+        'ratings': [['Good', 'Moderate', 'High'], ['Low', 'Good', 'High'], ['Low', 'Moderate', 'Good']],
+        'scores': [[90, 60, 30], [70, 90, 50], [50, 70, 90]],
+    },
+    'Beta': {
+        'metric': 'Beta', 'default': 1.0, 'scale': 1, 'weight': 0.3,
+        'thresholds': [[0.8, 1.0], [0.8, 1.2], [0.8, 1.2]],
+        'ratings': [['Good', 'Moderate', 'High'], ['Low', 'Good', 'High'], ['Low', 'Moderate', 'Good']],
+        'scores': [[90, 60, 30], [70, 90, 50], [50, 70, 90]],
+        'missing': ('Neutral', 50),
+    },
+    'Sharpe Ratio': {
+        'metric': 'Sharpe Ratio (Annual)', 'default': 0, 'scale': 1, 'weight': 0.2,
+        'thresholds': [[0, 0.5, 1.0, 1.5]],
+        'ratings': [['Poor', 'Below Average', 'Average', 'Good', 'Excellent']],
+        'scores': [[20, 40, 60, 80, 100]],
+    },
+    'Max Drawdown': {
+        'metric': 'Max Drawdown', 'default': 0, 'scale': 100, 'absolute': True, 'weight': 0.2,
+        'thresholds': [[15, 25], [15, 30], [20, 35]],
+        'ratings': [['Good', 'Moderate', 'High'], ['Low', 'Good', 'High'], ['Low', 'Moderate', 'Good']],
+        'scores': [[90, 60, 30], [70, 90, 50], [50, 70, 90]],
+    },
+}
+
+MATCH_THRESHOLDS = [30, 50, 70]
+MATCH_RATINGS = ['Poor Match', 'Moderate Match', 'Good Match', 'Excellent Match']
+MATCH_DESCRIPTIONS = [
+    "{ticker} appears too risky for your risk profile. Consider alternatives or a very small position.",
+    "{ticker} may be more volatile than your risk tolerance suggests. Consider as a smaller position.",
+    "{ticker} generally aligns with your risk tolerance with some considerations.",
+    "{ticker} aligns very well with your risk tolerance.",
+]
+
+def risk_tier(risk_score):
+    """Tier index (0 Conservative, 1 Moderate, 2 Aggressive) for a risk score"""
+    return np.digitize(risk_score, RISK_TIER_BOUNDS)
+
+def _factor_values(metrics, factor):
+    """Metric column for a factor as a float array, in the units of its thresholds"""
+    if factor['metric'] in metrics.columns:
+        values = metrics[factor['metric']].to_numpy(dtype=float)
+    else:
+        values = np.full(len(metrics), float(factor['default']))
+    if factor.get('absolute'):
+        values = np.abs(values)
+    return values * factor['scale']
+
+def evaluate_suitability_table(metrics, risk_score):
+    """Suitability of every ticker in a risk metrics table for one risk score.
+
+    Returns a DataFrame indexed by ticker with the overall score, match rating and
+    the rating and score of each factor, matching StockAnalyzer.evaluate_stock_suitability.
+    """
+    table = pd.DataFrame(index=metrics.index)
+    tier = int(risk_tier(risk_score))
+    overall = np.zeros(len(metrics))
+
+    for name, factor in SUITABILITY_FACTORS.items():
+        values = _factor_values(metrics, factor)
+        row = min(tier, len(factor['thresholds']) - 1)
+        bins = np.digitize(values, factor['thresholds'][row])
+
+        ratings = np.asarray(factor['ratings'][row], dtype=object)[bins]
+        scores = np.asarray(factor['scores'][row])[bins]
+        if 'missing' in factor:
+            missing = np.isnan(values)
+            ratings[missing] = factor['missing'][0]
+            scores[missing] = factor['missing'][1]
+
+        table[f'{name} Rating'] = ratings
+        table[f'{name} Score'] = scores
+        overall = overall + scores * factor['weight']
+
+    match = np.digitize(overall, MATCH_THRESHOLDS)
+    table.insert(0, 'Match Rating', np.asarray(MATCH_RATINGS, dtype=object)[match])
+    table.insert(0, 'Overall Suitability Score', overall)
+    return table
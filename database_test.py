@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+
+from utils.database import (
+    FULL_SCAN_QUERIES, MIGRATIONS, audit_query_plans, get_connection, get_schema_version, init_db
+)
+
+
+class QueryPlanTest(unittest.TestCase):
+    """The hot queries must be served by indexes on a freshly migrated database"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        init_db(self.db_path)
+        self.conn = get_connection(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_migrations_applied(self):
+        self.assertEqual(get_schema_version(self.conn), len(MIGRATIONS))
+        init_db(self.db_path)
+        self.assertEqual(get_schema_version(self.conn), len(MIGRATIONS))
+
+    def test_hot_queries_use_indexes(self):
+        self.assertEqual(audit_query_plans(self.conn), [])
+
+    def test_audit_reports_full_scan(self):
+        problems = audit_query_plans(self.conn, [("SELECT id FROM chat_messages WHERE message = ?", ('hi',))])
+        self.assertEqual(len(problems), 1)
+
+    def test_audit_reports_covering_index_scan(self):
+        queries = [
+            ("SELECT COUNT(*) FROM chat_messages", ()),
+            ("SELECT ticker FROM portfolio_items ORDER BY user_id, ticker", ()),
+        ]
+        self.assertEqual(len(audit_query_plans(self.conn, queries)), 2)
+
+    def test_full_scan_allowlist(self):
+        self.assertEqual(audit_query_plans(self.conn, [(sql, ()) for sql in FULL_SCAN_QUERIES]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+
+from utils.indicators import INDICATOR_COLUMNS, IndicatorState, calculate_indicator_panel, calculate_signal_panel
+
+SIGNAL_COLUMNS = ['MA_Signal', 'BB_Signal', 'Volume_Signal']
+
+
+class IndicatorStateTest(unittest.TestCase):
+    """IndicatorState must reproduce the batch indicator and signal panels bar by bar"""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        dates = pd.bdate_range('2024-01-01', periods=400)
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+        volume = rng.integers(100000, 5000000, len(dates)).astype(float)
+
+        self.close = pd.DataFrame({'T': close}, index=dates)
+        self.volume = pd.DataFrame({'T': volume}, index=dates)
+
+        panel = calculate_indicator_panel(self.close, self.volume)
+        signals = calculate_signal_panel(self.close, self.volume, panel)
+        self.expected = pd.DataFrame({column: panel[column]['T'] for column in INDICATOR_COLUMNS})
+        for column in SIGNAL_COLUMNS:
+            self.expected[column] = signals[column]['T']
+
+    def assert_bar_matches(self, values, row):
+        expected = self.expected.iloc[row]
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(
+                values[column], expected[column], rtol=1e-9, atol=1e-9, equal_nan=True,
+                err_msg=f"{column} at bar {row}"
+            )
+        for column in SIGNAL_COLUMNS:
+            self.assertEqual(values[column], expected[column], f"{column} at bar {row}")
+
+    def test_updates_from_empty_state(self):
+        state = IndicatorState()
+        for row, (close, volume) in enumerate(zip(self.close['T'], self.volume['T'])):
+            self.assert_bar_matches(state.update(close, volume), row)
+
+    def test_updates_after_seeding_from_history(self):
+        seed = 250
+        state = IndicatorState.from_history(self.close['T'].iloc[:seed], self.volume['T'].iloc[:seed])
+        self.assert_bar_matches(state.values, seed - 1)
+
+        for row in range(seed, len(self.close)):
+            values = state.update(self.close['T'].iloc[row], self.volume['T'].iloc[row])
+            self.assert_bar_matches(values, row)
+
+
+if __name__ == '__main__':
+    unittest.main()